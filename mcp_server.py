@@ -2,15 +2,51 @@
 BASIC MCP SERVER
 """
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context, Image
 import xmlrpc.client
+import asyncio
 import json
+import os
+import sys
+import urllib.error
+import urllib.request
+import uuid
+
+# The file index is shared with the workbench and needs no FreeCAD
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "workbench"))
+from FCStdIndex import FCStdIndex
 
 mcp = FastMCP("FreeCAD")
 
+class TrackedServerProxy:
+    """Routes calls through the RPC server's track() so their progress events carry the token"""
+    def __init__(self, server: xmlrpc.client.ServerProxy, token: str):
+        self.server = server
+        self.token = token
+
+    def __getattr__(self, method: str):
+        return lambda *args: self.server.track(self.token, method, list(args))
+
 class FreeCADClientServerProxy:
-    def __init__(self, host: str = "127.0.0.1", port: int = 8765):
-        self.server = xmlrpc.client.ServerProxy(f"http://{host}:{port}")
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, token: str | None = None):
+        self.host = host
+        self.port = port
+        self.server = xmlrpc.client.ServerProxy(f"http://{host}:{port}", allow_none=True)
+        if token:
+            self.server = TrackedServerProxy(self.server, token)
+
+    def tracked(self, token: str | None):
+        # xmlrpc proxies aren't thread safe, so tracked calls get their own connection
+        return FreeCADClientServerProxy(self.host, self.port, token)
+
+    def subscribe(self, token: str = ""):
+        return self.server.subscribe(token)
+
+    def poll_events(self, subscriber: int, timeout: float = 1.0):
+        return self.server.poll_events(subscriber, timeout)
+
+    def unsubscribe(self, subscriber: int):
+        return self.server.unsubscribe(subscriber)
 
     def new_document(self, name: str):
         return self.server.new_document(name)
@@ -21,6 +57,9 @@ class FreeCADClientServerProxy:
     def list_documents(self):
         return self.server.list_documents()
     
+    def get_type_schema(self, object_type: str):
+        return self.server.get_type_schema(object_type)
+
     def new_object(self, document_name: str, object_name: str, object_type: str, properties: dict = None):
         if properties is None:
             properties = {}
@@ -49,8 +88,85 @@ class FreeCADClientServerProxy:
     
     def execute_code(self, code: str):
         return self.server.execute_code(code)
+
+    def batch(self, document_name: str, operations: list):
+        return self.server.batch(document_name, operations)
+
+    def boolean(self, document_name: str, op: str, objects: list, result_name: str):
+        return self.server.boolean(document_name, op, objects, result_name)
+
+    def analyze(self, document_name: str, objects: list = None, interference: bool = True, tolerance: float = 1e-6):
+        return self.server.analyze(document_name, objects, interference, tolerance)
+
+    def export(self, document_name: str, objects: list = None, format: str = "step", options: dict = None):
+        return self.server.export(document_name, objects, format, options)
+
+    def render_view(self, document_name: str, camera: dict = None, size: list = None, objects: list = None, format: str = "png"):
+        return self.server.render_view(document_name, camera, size, objects, format)
+
+    def get_metrics(self):
+        return self.server.get_metrics()
+
+    def get_mesh(self, document_name: str, object_name: str, tolerance: float = 0.0):
+        """Fetches a mesh and returns it with its whole buffer as bytes in 'data'"""
+        result = self.server.get_mesh(document_name, object_name, tolerance, 0, "", False)
+        if result.get('status') != 'success':
+            return result
+        # One raw HTTP GET, rather than base64 chunks inside XML
+        try:
+            with urllib.request.urlopen(f"http://{self.host}:{self.port}{result['url']}") as response:
+                result['data'] = response.read()
+        except urllib.error.HTTPError as e:
+            return {'status': 'error', 'message': f"Could not download mesh {result['mesh_id']}: {e}"}
+        del result['chunk']
+        return result
     
 client = FreeCADClientServerProxy()
+file_index = FCStdIndex()
+
+def describe_event(event: dict) -> str:
+    name = event.get('event', '')
+    if name == 'queued':
+        return f"Queued (position {event.get('position')})"
+    if name == 'batch_progress':
+        return f"{event.get('method')} {event.get('progress')}/{event.get('total')}"
+    if name in ('recompute_started', 'recompute_finished'):
+        return f"{name.replace('_', ' ').capitalize()} for {event.get('document')}"
+    if name == 'done':
+        return f"Done ({event.get('status')})"
+    return name.replace('_', ' ').capitalize()
+
+async def with_progress(ctx: Context | None, call):
+    """
+    Runs call(proxy) against the FreeCAD server and forwards the progress events it
+    publishes as MCP progress notifications for the current tool call
+    """
+    token = uuid.uuid4().hex
+    events = client.tracked(None)
+    subscriber = (await asyncio.to_thread(events.subscribe, token))['subscriber']
+    task = asyncio.create_task(asyncio.to_thread(call, client.tracked(token)))
+
+    count = 0
+    try:
+        while True:
+            # Checked before polling so events published just before the result aren't lost,
+            # and once finished everything is already buffered, so don't wait for more
+            finished = task.done()
+            polled = await asyncio.to_thread(events.poll_events, subscriber, 0 if finished else 0.5)
+            for event in polled.get('events', []):
+                count += 1
+                if ctx is not None:
+                    await ctx.report_progress(count, message=describe_event(event))
+            if finished:
+                break
+            if any(event.get('event') == 'done' for event in polled.get('events', [])):
+                # The result is on its way, wait for it rather than for events that won't come
+                # (methods making several main-thread calls go back to polling on timeout)
+                await asyncio.wait({task}, timeout=0.5)
+    finally:
+        await asyncio.to_thread(events.unsubscribe, subscriber)
+
+    return task.result()
 
 @mcp.prompt()
 def freecad_instructions() -> str:
@@ -61,18 +177,24 @@ def freecad_instructions() -> str:
         - Line, Polyline, Fillet, Circle, Ellipse, Rectangle, Polygon
       - Part::
         - Cube, Cylinder, Sphere, Cone, Torus, Tube
-    2. To create basic objects, use new_object
+    2. To create basic objects, use new_object - if unsure which properties a type has, use get_type_schema first
     3. To change existing basic objects, use update_object
     4. To apply fillets or chamfers, use update_edges
     5. TO extrude, use create_sketch, then add_sketch_*, then extrude
     6. To delete basic objects or edges (e.g. fillets or chamfers), use delete_object
     7. For everything else, create a script and use execute_code
+    8. To make several changes at once, use batch - if any of them fails, none are applied
+    9. To fuse, cut or intersect objects (any number of them), use boolean rather than execute_code
+    10. To get volumes, centers of mass, bounding boxes or check for collisions, use analyze
+    11. To save objects as STEP, STL or BREP files, use export
+    12. To find parts in .FCStd files on disk without opening them, use index_files once, then search_files
+    13. To see what the model looks like, use render_view
     """
 
 @mcp.tool()
-def create_document(name: str = "Unnamed") -> str:
+async def create_document(name: str = "Unnamed", ctx: Context = None) -> str:
     """Create a new FreeCAD document"""
-    result = client.new_document(name)
+    result = await with_progress(ctx, lambda proxy: proxy.new_document(name))
     return json.dumps(result)
 
 @mcp.tool()
@@ -88,7 +210,23 @@ def list_documents() -> str:
     return json.dumps(result)
 
 @mcp.tool()
-def create_object(document_name: str, object_name: str, object_type: str, properties: dict | None = None ) -> str:
+async def get_type_schema(object_type: str, ctx: Context = None) -> str:
+    """
+    Lists the properties of a FreeCAD object type so create_object and update_object get them right the first time
+
+    Arguments:
+      object_type: FreeCAD object type (e.g., 'Part::Box', 'Part::Fillet', 'PartDesign::Pad')
+
+    Returns:
+      JSON string with each property's FreeCAD type (e.g. App::PropertyLength, App::PropertyLink),
+      group, description, whether it is read-only and, for enumerations, the allowed values.
+      View properties (set through "ViewObject") are listed separately under view_properties.
+    """
+    result = await with_progress(ctx, lambda proxy: proxy.get_type_schema(object_type))
+    return json.dumps(result)
+
+@mcp.tool()
+async def create_object(document_name: str, object_name: str, object_type: str, properties: dict | None = None, ctx: Context = None) -> str:
     """
     Create a new object in a FreeCAD document
     
@@ -97,6 +235,7 @@ def create_object(document_name: str, object_name: str, object_type: str, proper
       object_name: name for the new object
       object_type: FreeCAD object type (e.g., 'Part::Box', 'Part::Sphere', 'Draft::Circle')
       properties: dictionary of object properties (Length, Width, Height, Radius, etc.)
+        Unknown or read-only properties are rejected, links (e.g. "Base") are given as object names
     
     Returns:
       JSON string with status and object name
@@ -133,11 +272,11 @@ def create_object(document_name: str, object_name: str, object_type: str, proper
       }
 
     """
-    result = client.new_object(document_name, object_name, object_type, properties)
+    result = await with_progress(ctx, lambda proxy: proxy.new_object(document_name, object_name, object_type, properties))
     return json.dumps(result)
 
 @mcp.tool()
-def update_object(document_name: str, object_name: str, properties: dict | None = None) -> str:
+async def update_object(document_name: str, object_name: str, properties: dict | None = None, ctx: Context = None) -> str:
     """
     Updates the properties of an existing FreeCAD object
 
@@ -180,11 +319,11 @@ def update_object(document_name: str, object_name: str, properties: dict | None
     Returns:
       JSON string with status and object name
     """
-    result = client.update_object(document_name, object_name, properties)
+    result = await with_progress(ctx, lambda proxy: proxy.update_object(document_name, object_name, properties))
     return json.dumps(result)
 
 @mcp.tool()
-def delete_object(document_name: str, object_name: str) -> str:
+async def delete_object(document_name: str, object_name: str, ctx: Context = None) -> str:
     """
     Delete an existing FreeCAD object
 
@@ -195,12 +334,12 @@ def delete_object(document_name: str, object_name: str) -> str:
     Returns:
       JSON string with status and object name
     """
-    result = client.delete_object(document_name, object_name)
+    result = await with_progress(ctx, lambda proxy: proxy.delete_object(document_name, object_name))
     return json.dumps(result)
 
 # Claude has no idea what is required for Edges
 @mcp.tool()
-def update_edges(document_name, base_object_name, edge_type, edges) -> str:
+async def update_edges(document_name, base_object_name, edge_type, edges, ctx: Context = None) -> str:
     """
     Updates the edges on a FreeCAD object
 
@@ -221,17 +360,17 @@ def update_edges(document_name, base_object_name, edge_type, edges) -> str:
       edge_type: 'Part::Fillet'
       edges: [[1, 1.0, 1.0], [2, 1.0, 1.0], [3, 1.0, 1.0], [4, 1.0, 1.0], [5, 1.0, 1.0], [6, 1.0, 1.0], [7, 1.0, 1.0], [8, 1.0, 1.0], [9, 1.0, 1.0], [10, 1.0, 1.0], [11, 1.0, 1.0], [12, 1.0, 1.0]]
     """
-    result = client.update_edges(document_name, base_object_name, edge_type, edges)
+    result = await with_progress(ctx, lambda proxy: proxy.update_edges(document_name, base_object_name, edge_type, edges))
     return json.dumps(result)
 
 @mcp.tool()
-def create_sketch(document_name: str, sketch_name: str, plane: str = "XY") -> str:
+async def create_sketch(document_name: str, sketch_name: str, plane: str = "XY", ctx: Context = None) -> str:
     '''Create a new sketch on a plane (XY, XZ, or YZ)'''
-    result = client.create_sketch(document_name, sketch_name, plane)
+    result = await with_progress(ctx, lambda proxy: proxy.create_sketch(document_name, sketch_name, plane))
     return json.dumps(result)
 
 @mcp.tool()
-def add_sketch_circle(document_name: str, sketch_name: str, center_x: float, center_y: float, radius: float) -> str:
+async def add_sketch_circle(document_name: str, sketch_name: str, center_x: float, center_y: float, radius: float, ctx: Context = None) -> str:
     '''
     Add a circle to a sketch
     
@@ -242,11 +381,11 @@ def add_sketch_circle(document_name: str, sketch_name: str, center_x: float, cen
       center_y: 0
       radius: 5
     '''
-    result = client.add_sketch_circle(document_name, sketch_name, center_x, center_y, radius)
+    result = await with_progress(ctx, lambda proxy: proxy.add_sketch_circle(document_name, sketch_name, center_x, center_y, radius))
     return json.dumps(result)
 
 @mcp.tool()
-def add_sketch_rectangle(document_name: str, sketch_name: str, x1: float, y1: float, x2: float, y2: float) -> str:
+async def add_sketch_rectangle(document_name: str, sketch_name: str, x1: float, y1: float, x2: float, y2: float, ctx: Context = None) -> str:
     '''
     Add a rectangle to a sketch (defined by two opposite corners)
     
@@ -258,19 +397,19 @@ def add_sketch_rectangle(document_name: str, sketch_name: str, x1: float, y1: fl
       x2: 10
       y2: 5
     '''
-    result = client.add_sketch_rectangle(document_name, sketch_name, x1, y1, x2, y2)
+    result = await with_progress(ctx, lambda proxy: proxy.add_sketch_rectangle(document_name, sketch_name, x1, y1, x2, y2))
     return json.dumps(result)
 
 @mcp.tool()
-def extrude(document_name: str, pad_name: str, sketch_name: str, length: float, symmetric: bool = False) -> str:
+async def extrude(document_name: str, pad_name: str, sketch_name: str, length: float, symmetric: bool = False, ctx: Context = None) -> str:
     '''Extrude (Pad) a sketch into a 3D solid'''
-    result = client.extrude(document_name, pad_name, sketch_name, length, symmetric)
+    result = await with_progress(ctx, lambda proxy: proxy.extrude(document_name, pad_name, sketch_name, length, symmetric))
     return json.dumps(result)
 
 @mcp.tool()
-def execute_code(code: str) -> str:
+async def execute_code(code: str, ctx: Context = None) -> str:
     """
-    Executes code on the FreeCAD server
+    Executes code on the FreeCAD server. If it fails, its changes to the active document are rolled back.
 
     Arguments:
       code: arbritrary Python code to execute
@@ -278,7 +417,166 @@ def execute_code(code: str) -> str:
     Returns:
       JSON string with status and object name
     """
-    result = client.execute_code(code)
+    result = await with_progress(ctx, lambda proxy: proxy.execute_code(code))
+    return json.dumps(result)
+
+@mcp.tool()
+async def batch(document_name: str, operations: list[dict], ctx: Context = None) -> str:
+    """
+    Runs several operations on a document as a single step (one undo entry in FreeCAD).
+    If any operation fails, every change in the batch is rolled back.
+
+    Arguments:
+      document_name: the name of the document to operate on
+      operations: list of {"method": ..., "args": ...} where method is one of new_object, update_object,
+        delete_object, update_edges, create_sketch, add_sketch_circle, add_sketch_rectangle or extrude,
+        and args are that tool's arguments (without document_name) as a list or a dictionary
+
+    Returns:
+      JSON string with status and the result of each operation, or the error and the index of the failed operation
+
+    Examples:
+      To create a box and fillet all of its top edges in one step:
+
+      document_name: 'MyDocument',
+      operations: [
+        {"method": "new_object", "args": {"object_name": "MyBox", "object_type": "Part::Box", "properties": {"Length": 20}}},
+        {"method": "update_edges", "args": ["MyBox", "Part::Fillet", [[2, 1.0, 1.0], [4, 1.0, 1.0]]]}
+      ]
+    """
+    result = await with_progress(ctx, lambda proxy: proxy.batch(document_name, operations))
+    return json.dumps(result)
+
+@mcp.tool()
+async def boolean(document_name: str, op: str, objects: list[str], result_name: str, ctx: Context = None) -> str:
+    """
+    Combines many objects into a single object with one boolean operation
+
+    Arguments:
+      document_name: the name of the document containing the objects
+      op: 'fuse' (union), 'cut' (subtract every other object from the first) or 'common' (intersection)
+      objects: names of the objects to combine (at least two) - for 'cut' the first one is the base
+      result_name: name for the resulting object
+
+    Returns:
+      JSON string with status, object name and number of operands. Up to 32 objects become a
+      parametric boolean feature; larger sets are computed in parallel and stored as a plain shape.
+
+    Examples:
+      To drill three holes into a plate:
+
+      document_name: 'MyDocument',
+      op: 'cut',
+      objects: ['Plate', 'Hole1', 'Hole2', 'Hole3'],
+      result_name: 'DrilledPlate'
+    """
+    result = await with_progress(ctx, lambda proxy: proxy.boolean(document_name, op, objects, result_name))
+    return json.dumps(result)
+
+@mcp.tool()
+async def analyze(document_name: str, objects: list[str] | None = None, interference: bool = True, tolerance: float = 1e-6, ctx: Context = None) -> str:
+    """
+    Computes mass properties of objects and checks which of them collide
+
+    Arguments:
+      document_name: the name of the document to analyze
+      objects: names of the objects to analyze (defaults to every final shape, i.e. not used by another object)
+      interference: whether to check every pair of objects for overlap
+      tolerance: overlap volume below which two objects are considered touching rather than colliding
+
+    Returns:
+      JSON string with, per object, volume, area, center_of_mass [x, y, z], bound_box {min, max, size}
+      and number of solids, plus a list of interferences {a, b, volume} when interference is true
+    """
+    result = await with_progress(ctx, lambda proxy: proxy.analyze(document_name, objects, interference, tolerance))
+    return json.dumps(result)
+
+@mcp.tool()
+async def export(document_name: str, objects: list[str] | None = None, format: str = "step", options: dict | None = None, ctx: Context = None) -> str:
+    """
+    Exports objects to a STEP, STL or BREP file. Exporting an unchanged model again returns the previous file immediately.
+
+    Arguments:
+      document_name: the name of the document to export from
+      objects: names of the objects to export (defaults to every final shape, i.e. not used by another object)
+      format: 'step', 'stl' or 'brep'
+      options: optional dictionary with
+        path: where to write the file (otherwise it stays in FreeCAD's export cache)
+        tolerance: maximum distance between the mesh and the surface for STL (default 0.1)
+        angular_tolerance: maximum angle between mesh triangles in radians for STL (default 0.5)
+
+    Returns:
+      JSON string with status, path, size in bytes, whether it came from the cache and how long it took
+    """
+    result = await with_progress(ctx, lambda proxy: proxy.export(document_name, objects, format, options))
+    return json.dumps(result)
+
+@mcp.tool()
+async def index_files(paths: list[str]) -> str:
+    """
+    Indexes .FCStd files so search_files can find their contents without opening them (FreeCAD doesn't need to be running).
+    Only new or changed files are read, so it is cheap to run again before searching.
+
+    Arguments:
+      paths: .FCStd files and/or directories to index (directories are searched recursively)
+
+    Returns:
+      JSON string with the number of files indexed, unchanged and removed, and any unreadable files
+    """
+    result = await asyncio.to_thread(file_index.update, paths)
+    return json.dumps({'status': 'success', **result})
+
+@mcp.tool()
+async def search_files(type: str = "", name: str = "", path: str = "", limit: int = 100) -> str:
+    """
+    Searches the objects in indexed .FCStd files (see index_files) without opening them
+
+    Arguments:
+      type: FreeCAD object type, exactly (e.g. 'Part::Box') or by module (e.g. 'PartDesign::')
+      name: text contained in the object's name or label (case-insensitive)
+      path: only files whose path starts with this (e.g. a directory, or one file to list its contents)
+      limit: maximum number of objects to return
+
+    Returns:
+      JSON string with matching objects: file path, name, type, label, simple property values
+      (numbers, strings, placements, vectors) and the names of the objects it depends on
+    """
+    result = await asyncio.to_thread(file_index.query, type or None, name or None, path or None, limit)
+    return json.dumps({'status': 'success', 'objects': result})
+
+@mcp.tool()
+async def render_view(document_name: str, camera: dict | None = None, size: list[int] | None = None, objects: list[str] | None = None, format: str = "png", ctx: Context = None) -> Image:
+    """
+    Renders a picture of a FreeCAD document offscreen, with its own camera, so the FreeCAD window's view and
+    object visibility are left as they are. Asking again for an unchanged model returns the same image instantly.
+
+    Arguments:
+      document_name: the name of the document to render
+      camera: optional dictionary with
+        view: 'isometric' (default), 'front', 'rear', 'top', 'bottom', 'left' or 'right' - the model is zoomed to fit
+        background: 'Current' (default), 'White', 'Black' or 'Transparent'
+        quality: 0-100, for webp only (default 80)
+      size: [width, height] in pixels (default [800, 600], at most 4096 each)
+      objects: only show these objects (defaults to what is currently visible)
+      format: 'png' or 'webp' (smaller)
+
+    Examples:
+      To look at just the cube from the front:
+
+      document_name: 'MyDocument',
+      camera: {"view": "front"},
+      size: [640, 480],
+      objects: ['MyCube']
+    """
+    result = await with_progress(ctx, lambda proxy: proxy.render_view(document_name, camera, size, objects, format))
+    if result.get('status') != 'success':
+        raise RuntimeError(result.get('message', 'Render failed'))
+    return Image(data=result['data'].data, format=result['format'])
+
+@mcp.tool()
+def get_metrics() -> str:
+    """Returns FreeCAD server metrics: render times, cache hit rates and how many calls are queued"""
+    result = client.get_metrics()
     return json.dumps(result)
 
 
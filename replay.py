@@ -0,0 +1,138 @@
+"""
+REPLAYS AN RPC JOURNAL AS A LOAD TEST
+
+Record traffic by starting FreeCAD with FREECAD_MCP_JOURNAL set to a directory, then:
+
+    python replay.py <journal file or directory> [--url http://127.0.0.1:8765] [--speed 1]
+    python replay.py <journal> --stub --speed 0
+
+--speed 1 keeps the original timing, 10 replays ten times faster and 0 sends calls as fast
+as possible. Against a live server the calls really run, so replay into a scratch FreeCAD.
+--stub replays against an in-process server that stands in for FreeCAD: one call at a time
+(like FreeCAD's main thread), each taking the median recorded execution time of its method.
+
+With timing kept (--speed > 0) latency is measured from when a call was due to be sent, not
+from when a worker got to it, so calls held back by a saturated client still count their
+wait. --speed 0 is a closed loop and measures each call from when it is actually sent.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import xmlrpc.client
+
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCServer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "workbench"))
+import Journal
+
+class StubServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+class StubBackend:
+    """Answers every call with success after the method's median recorded execution time"""
+    def __init__(self, records: list):
+        runs = {}
+        for record in records:
+            runs.setdefault(record['method'], []).append(record['run'])
+        self.run_times = {method: statistics.median(times) for method, times in runs.items()}
+        self.main_thread = threading.Lock()
+
+    def _dispatch(self, method: str, params: tuple):
+        with self.main_thread:
+            time.sleep(self.run_times.get(method, 0.0))
+        return {'status': 'success'}
+
+def start_stub(records: list) -> str:
+    server = StubServer(("127.0.0.1", 0), allow_none=True, logRequests=False)
+    server.register_instance(StubBackend(records))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def replay(records: list, url: str, speed: float, workers: int) -> list:
+    """
+    Send every record at its (scaled) original offset and return [(latency, status), ...] in order,
+    latency counting from the scheduled send time when speed > 0
+    """
+    local = threading.local()
+    results = [None] * len(records)
+
+    def send(index: int, record: dict, scheduled: float | None):
+        # xmlrpc proxies aren't thread safe, so each worker has its own
+        if not hasattr(local, 'proxy'):
+            local.proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+        start = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            result = getattr(local.proxy, record['method'])(*record['params'])
+            status = Journal.STATUSES[Journal.status_code(result)]
+        except Exception:
+            status = 'exception'
+        results[index] = (time.perf_counter() - start, status)
+
+    first = records[0]['arrival']
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, record in enumerate(records):
+            scheduled = None
+            if speed > 0:
+                scheduled = began + (record['arrival'] - first) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, index, record, scheduled)
+    return results
+
+def report(records: list, results: list, elapsed: float, speed: float):
+    methods = sorted({record['method'] for record in records})
+    print(f"{'method':<24}{'calls':>7}{'rec p50':>10}{'rec p95':>10}{'run p50':>10}{'run p95':>10}{'rec err':>9}{'run err':>9}")
+    for method in methods:
+        indices = [i for i, record in enumerate(records) if record['method'] == method]
+        recorded = [(records[i]['wait'] + records[i]['run']) * 1000 for i in indices]
+        replayed = [results[i][0] * 1000 for i in indices]
+        recorded_errors = sum(records[i]['status'] != 'success' for i in indices)
+        replayed_errors = sum(results[i][1] != 'success' for i in indices)
+        print(f"{method:<24}{len(indices):>7}{percentile(recorded, .5):>10.1f}{percentile(recorded, .95):>10.1f}"
+              f"{percentile(replayed, .5):>10.1f}{percentile(replayed, .95):>10.1f}{recorded_errors:>9}{replayed_errors:>9}")
+
+    last = max(records, key=lambda record: record['arrival'] + record['wait'] + record['run'])
+    recorded_span = last['arrival'] + last['wait'] + last['run'] - records[0]['arrival']
+    print(f"\nLatencies in ms (recorded = server-side queue wait + execution, replayed = client round trip"
+          f"{' from the scheduled send time' if speed > 0 else ''})")
+    print(f"Recorded: {len(records)} calls in {recorded_span:.2f}s ({len(records) / max(recorded_span, 1e-9):.1f} calls/s)")
+    print(f"Replayed: {len(results)} calls in {elapsed:.2f}s ({len(results) / max(elapsed, 1e-9):.1f} calls/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an RPC journal against a FreeCAD RPC server")
+    parser.add_argument("journal", help="journal file or directory")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="RPC server to replay against")
+    parser.add_argument("--stub", action="store_true", help="replay against an in-process stub instead of FreeCAD")
+    parser.add_argument("--speed", type=float, default=1.0, help="timing multiplier, 0 for as fast as possible")
+    parser.add_argument("--workers", type=int, default=8, help="maximum concurrent calls")
+    parser.add_argument("--methods", nargs="*", help="only replay these methods")
+    args = parser.parse_args()
+
+    records = sorted(Journal.read(args.journal), key=lambda record: record['arrival'])
+    if args.methods:
+        records = [record for record in records if record['method'] in args.methods]
+    if not records:
+        print("Error: Journal has no calls to replay")
+        return
+
+    url = start_stub(records) if args.stub else args.url
+    start = time.perf_counter()
+    results = replay(records, url, args.speed, args.workers)
+    report(records, results, time.perf_counter() - start, args.speed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Boolean operations on many shapes at once.
+
+Large sets are combined as a balanced tree: shapes are split into groups, each group
+is combined in its own worker process (shapes travel as BREP strings), and the
+partial results are grouped and combined again until one shape is left. Nothing
+here touches a document, so it can run off the main thread.
+"""
+
+import math
+import multiprocessing
+import multiprocessing.spawn
+import os
+import sys
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+
+OPERATIONS = ('fuse', 'cut', 'common')
+
+# Largest group combined in one step of the tree
+MAX_FAN_IN = 16
+# The spawn executable is process-wide, so only one reduction at a time may swap it
+_executable_lock = threading.Lock()
+
+
+def combine(op: str, breps: list) -> str:
+    """Combine BREP shapes with op (the first shape is the base for cut) and return a BREP"""
+    import Part
+
+    shapes = []
+    for brep in breps:
+        shape = Part.Shape()
+        shape.importBrepFromString(brep)
+        shapes.append(shape)
+
+    first, rest = shapes[0], shapes[1:]
+    if not rest:
+        return brep_of(first)
+    if op == 'fuse':
+        result = first.fuse(rest)
+    elif op == 'common':
+        result = first.common(rest)
+    else:
+        result = first.cut(rest)
+    return brep_of(result)
+
+
+def brep_of(shape) -> str:
+    return shape.exportBrepToString()
+
+
+def python_executable() -> str | None:
+    """Python interpreter for worker processes (inside FreeCAD sys.executable is FreeCAD itself)"""
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+
+    import FreeCAD
+    home = FreeCAD.getHomePath()
+    for candidate in ('bin/python.exe', 'bin/python3', 'bin/python', 'usr/bin/python3', 'usr/bin/python'):
+        path = os.path.join(home, candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def tree_reduce(op: str, breps: list, progress=None, workers: int | None = None) -> str:
+    """
+    Reduce BREP shapes to one with fuse or common, computing each level of the tree in parallel.
+    Falls back to combining everything in this process if no worker interpreter can be found.
+    """
+    executable = python_executable()
+    if executable is None:
+        return combine(op, breps)
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    context = multiprocessing.get_context('spawn')
+
+    level = 0
+    with _executable_lock:
+        # set_executable() changes it for every user of multiprocessing in FreeCAD (workers
+        # are spawned on demand, so for the pool's whole life), so put the old one back after
+        previous = multiprocessing.spawn.get_executable()
+        context.set_executable(executable)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                while len(breps) > 1:
+                    # Enough groups to keep every worker busy, but each at least a pair
+                    fan_in = max(2, min(MAX_FAN_IN, math.ceil(len(breps) / workers)))
+                    groups = [breps[i:i + fan_in] for i in range(0, len(breps), fan_in)]
+                    breps = list(pool.map(combine, [op] * len(groups), groups))
+                    level += 1
+                    if progress:
+                        progress(level, len(breps))
+        finally:
+            context.set_executable(previous)
+    return breps[0]
@@ -0,0 +1,126 @@
+"""
+Exports shapes to STEP, STL or BREP files with an on-disk cache.
+
+Exports work on copies of the document's shapes, not on the document itself, so they
+can run off the main thread (STL meshing rewrites the triangulation stored on a shape,
+which the document's own shape shares with its view provider). Files are written to a temporary name and renamed into
+the cache once complete. The cache key is the export format, its options and a
+digest of every exported shape's BREP serialization (geometry, topology and
+placement), so asking again for an unchanged model returns the existing file while
+any real change misses. Serializing to BREP is far cheaper than the STEP or STL
+export it saves. The cache's index lives in memory, so its directory is emptied on
+startup.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+
+FORMATS = {'step': '.step', 'stl': '.stl', 'brep': '.brep'}
+
+
+def shape_digest(shape) -> str:
+    """Content hash of a shape, equal for identical geometry and placement in any session"""
+    return hashlib.sha1(shape.exportBrepToString().encode()).hexdigest()
+
+
+def write(shape, format: str, path: str, options: dict):
+    if format == 'step':
+        shape.exportStep(path)
+    elif format == 'brep':
+        shape.exportBrep(path)
+    else:
+        import MeshPart
+        mesh = MeshPart.meshFromShape(
+            Shape=shape,
+            LinearDeflection=float(options.get('tolerance', 0.1)),
+            AngularDeflection=float(options.get('angular_tolerance', 0.5))
+        )
+        mesh.write(path)
+
+
+class ExportCache:
+    """Export files keyed by shape digests and options, evicted least recently used past max_bytes"""
+
+    def __init__(self, directory: str | None = None, max_bytes: int = 1024 ** 3):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'freecad-mcp-exports')
+        self.max_bytes = max_bytes
+        # key -> (path, size), oldest first
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # key -> lock, so identical concurrent requests export once
+        self._pending = {}
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, format: str, shapes: dict, options: dict) -> str:
+        options = {k: v for k, v in options.items() if k != 'path'}
+        content = json.dumps([format, options, sorted((name, shape_digest(shape)) for name, shape in shapes.items())], sort_keys=True)
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def export(self, format: str, shapes: dict, options: dict) -> dict:
+        """Return {'path', 'bytes', 'cached', 'seconds'} for the export, writing it only on a cache miss"""
+        key = self.key(format, shapes, options)
+
+        with self._lock:
+            pending = self._pending.setdefault(key, threading.Lock())
+        try:
+            with pending:
+                return self._export(key, format, shapes, options)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _export(self, key: str, format: str, shapes: dict, options: dict) -> dict:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and os.path.exists(entry[0]):
+                self._entries.move_to_end(key)
+                return {'path': entry[0], 'bytes': entry[1], 'cached': True, 'seconds': 0.0}
+
+        start = time.perf_counter()
+        # Mesh formats are picked from the extension, so it has to stay last
+        path = os.path.join(self.directory, key + FORMATS[format])
+        partial = os.path.join(self.directory, key + '.partial' + FORMATS[format])
+
+        shape = self._compound(list(shapes.values()))
+        try:
+            write(shape, format, partial, options)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        size = os.path.getsize(path)
+        self._store(key, path, size)
+        return {'path': path, 'bytes': size, 'cached': False, 'seconds': time.perf_counter() - start}
+
+    def _compound(self, shapes: list):
+        if len(shapes) == 1:
+            return shapes[0]
+        import Part
+        return Part.makeCompound(shapes)
+
+    def _store(self, key: str, path: str, size: int):
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (path, size)
+            self._size += size
+
+            # Evict the least recently used files, but always keep the one just written
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old_path, old_size = self._entries.popitem(last=False)[1]
+                self._size -= old_size
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
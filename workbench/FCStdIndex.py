@@ -0,0 +1,256 @@
+"""
+Searchable index of .FCStd files that doesn't need FreeCAD.
+
+An .FCStd file is a zip archive whose Document.xml lists every object, its type,
+its dependencies and its property values. That XML is streamed through an
+incremental parser, so even huge documents are read without building the whole
+tree, and the interesting parts (names, types, labels, simple property values and
+links) are stored in a small SQLite database. A file is only parsed again when its
+modification time or size changes.
+
+Only the standard library is used so the MCP server can search part libraries
+without a running FreeCAD.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import zipfile
+
+from contextlib import contextmanager
+from xml.etree import ElementTree
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'freecad-mcp', 'fcstd-index.sqlite3')
+
+# Property value elements worth indexing (lists, shapes and other blobs are skipped)
+VALUE_TAGS = {'Float', 'Integer', 'String', 'Bool', 'PropertyPlacement', 'PropertyVector'}
+MAX_STRING_LENGTH = 200
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, mtime REAL, size INTEGER, label TEXT, objects INTEGER, error TEXT
+);
+CREATE TABLE IF NOT EXISTS objects (
+    path TEXT, name TEXT, type TEXT, label TEXT, properties TEXT, links TEXT
+);
+CREATE INDEX IF NOT EXISTS objects_path ON objects(path);
+CREATE INDEX IF NOT EXISTS objects_type ON objects(type);
+'''
+
+
+def _value(element):
+    tag = element.tag
+    attrib = element.attrib
+    if tag == 'PropertyPlacement':
+        return {
+            'Base': [float(attrib.get(k, 0)) for k in ('Px', 'Py', 'Pz')],
+            'Rotation': {
+                'Axis': [float(attrib.get(k, 0)) for k in ('Ox', 'Oy', 'Oz')],
+                'Angle': math.degrees(float(attrib.get('A', 0)))
+            }
+        }
+    if tag == 'PropertyVector':
+        return [float(attrib.get(k, 0)) for k in ('valueX', 'valueY', 'valueZ')]
+
+    value = attrib.get('value')
+    if value is None:
+        return None
+    if tag == 'Float':
+        return float(value)
+    if tag == 'Integer':
+        return int(value)
+    if tag == 'Bool':
+        return value == 'true'
+    return value if len(value) <= MAX_STRING_LENGTH else None
+
+
+def parse_document(path: str) -> dict:
+    """Read {'label', 'objects': [{'name', 'type', 'label', 'properties', 'links'}, ...]} from an .FCStd file"""
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('Document.xml') as stream:
+            return _parse(stream)
+
+
+def _parse(stream) -> dict:
+    label = None
+    objects = {}
+    links = {}
+
+    section = None      # 'Objects' (types and dependencies) or 'ObjectData' (property values)
+    owner = None        # object whose dependencies or properties are being read
+    prop = None         # property whose value is being read
+    prop_depth = 0      # depth of its <Property> element, values are its direct children
+    found = False       # whether prop already has its value
+    depth = 0
+
+    for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            depth += 1
+            if tag in ('Objects', 'ObjectData'):
+                section = tag
+            elif tag == 'ObjectDeps':
+                owner = element.get('obj')
+                links[owner] = []
+            elif tag == 'Dep' and owner is not None:
+                links[owner].append(element.get('name'))
+            elif tag == 'Object' and section == 'Objects':
+                name = element.get('name')
+                objects[name] = {'name': name, 'type': element.get('type'), 'label': None, 'properties': {}}
+            elif tag == 'Object' and section == 'ObjectData':
+                owner = element.get('name')
+            elif tag == 'Property':
+                prop = element.get('name')
+                prop_depth = depth
+                found = False
+            elif prop is not None and not found and depth == prop_depth + 1 and tag in VALUE_TAGS:
+                found = True
+                value = _value(element)
+                if value is None:
+                    continue
+                if section is None and prop == 'Label':
+                    label = value
+                elif section == 'ObjectData' and owner in objects:
+                    if prop == 'Label':
+                        objects[owner]['label'] = value
+                    else:
+                        objects[owner]['properties'][prop] = value
+        else:
+            depth -= 1
+            if tag == 'Property':
+                prop = None
+            elif tag == 'ObjectDeps' or (tag == 'Object' and section == 'ObjectData'):
+                owner = None
+            elif tag in ('Objects', 'ObjectData'):
+                section = None
+            # Keep memory flat however large the document is
+            element.clear()
+
+    for name, object in objects.items():
+        object['links'] = [link for link in links.get(name, []) if link]
+    return {'label': label, 'objects': list(objects.values())}
+
+
+def _like(text: str) -> str:
+    # Match text literally inside a LIKE pattern that uses a backslash as its escape character
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class FCStdIndex:
+    """SQLite index of .FCStd files, refreshed incrementally by modification time and size"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One connection per call, so the index can be used from any thread
+        db = sqlite3.connect(self.path)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _files(self, paths: list) -> list:
+        found = []
+        for path in paths:
+            path = os.path.abspath(os.path.expanduser(path))
+            if os.path.isdir(path):
+                for directory, _, names in os.walk(path):
+                    found.extend(os.path.join(directory, n) for n in names if n.lower().endswith('.fcstd'))
+            elif os.path.isfile(path):
+                found.append(path)
+        return found
+
+    def update(self, paths: list) -> dict:
+        """Index .FCStd files and directories (recursively), parsing only new or changed files"""
+        files = self._files(paths)
+        indexed = unchanged = removed = 0
+        errors = []
+        unreadable = set()
+
+        with self._connect() as db:
+            known = dict((row[0], (row[1], row[2])) for row in db.execute('SELECT path, mtime, size FROM files'))
+
+            for file in files:
+                try:
+                    stat = os.stat(file)
+                except OSError as e:
+                    # Dangling symlinks and unreadable entries mustn't abort (and roll back) the whole run
+                    errors.append({'path': file, 'message': str(e)})
+                    unreadable.add(file)
+                    continue
+                if known.get(file) == (stat.st_mtime, stat.st_size):
+                    unchanged += 1
+                    continue
+
+                try:
+                    document = parse_document(file)
+                    error = None
+                except (OSError, KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+                    document = {'label': None, 'objects': []}
+                    error = str(e)
+                    errors.append({'path': file, 'message': error})
+
+                db.execute('DELETE FROM objects WHERE path = ?', (file,))
+                db.execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                    (file, stat.st_mtime, stat.st_size, document['label'], len(document['objects']), error)
+                )
+                db.executemany('INSERT INTO objects VALUES (?, ?, ?, ?, ?, ?)', [
+                    (file, o['name'], o['type'], o['label'],
+                     json.dumps(o['properties'], separators=(',', ':')), json.dumps(o['links'], separators=(',', ':')))
+                    for o in document['objects']
+                ])
+                indexed += 1
+
+            # Forget files that were deleted from the indexed directories
+            directories = [os.path.abspath(os.path.expanduser(p)) for p in paths if os.path.isdir(os.path.expanduser(p))]
+            present = set(files) - unreadable
+            for file in known:
+                if file not in present and any(file.startswith(d + os.sep) for d in directories):
+                    db.execute('DELETE FROM objects WHERE path = ?', (file,))
+                    db.execute('DELETE FROM files WHERE path = ?', (file,))
+                    removed += 1
+
+        return {'indexed': indexed, 'unchanged': unchanged, 'removed': removed, 'errors': errors}
+
+    def query(self, type: str | None = None, name: str | None = None, path: str | None = None, limit: int = 100) -> list:
+        """
+        Objects matching every given filter: type exactly (e.g. 'Part::Box') or by prefix
+        (e.g. 'PartDesign::'), name or label containing name (case-insensitively), file in
+        or under path
+        """
+        clauses = []
+        params = []
+        if type:
+            clauses.append("type LIKE ? ESCAPE '\\'" if type.endswith('::') else 'type = ?')
+            params.append(_like(type) + '%' if type.endswith('::') else type)
+        if name:
+            clauses.append("(name LIKE ? ESCAPE '\\' OR label LIKE ? ESCAPE '\\')")
+            params += [f'%{_like(name)}%'] * 2
+        if path:
+            # Compared exactly (LIKE ignores case), and directories only match files inside them
+            path = os.path.abspath(os.path.expanduser(path))
+            if os.path.isdir(path):
+                path = os.path.join(path, '')
+            clauses.append('substr(path, 1, length(?)) = ?')
+            params += [path] * 2
+
+        sql = 'SELECT path, name, type, label, properties, links FROM objects'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY path, rowid LIMIT ?'
+        params.append(limit)
+
+        with self._connect() as db:
+            return [
+                {'path': row[0], 'name': row[1], 'type': row[2], 'label': row[3],
+                 'properties': json.loads(row[4]), 'links': json.loads(row[5])}
+                for row in db.execute(sql, params)
+            ]
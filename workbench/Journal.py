@@ -0,0 +1,122 @@
+"""
+Append-only binary journal of RPC calls, for replaying real traffic as a load test.
+
+Each journal file starts with MAGIC followed by records of:
+    uint32 length of the rest of the record
+    float64 arrival time (unix seconds)
+    float32 queue wait (seconds spent waiting for the main thread)
+    float32 execution time (seconds)
+    uint8 status (see STATUSES)
+    uint16 + bytes method name
+    uint16 + bytes client address
+    uint32 + bytes zlib-compressed XML-RPC params
+
+Files are rotated once they reach max_file_bytes and the oldest ones are deleted once
+the journal directory passes max_total_bytes. Only the standard library is used so
+the replay tool can read journals without FreeCAD.
+"""
+
+import glob
+import os
+import struct
+import threading
+import time
+import xmlrpc.client
+import zlib
+
+MAGIC = b'FCJ1'
+STATUSES = ['success', 'error', 'queued', 'exception', 'other']
+HEADER = struct.Struct('<dffB')
+LENGTH = struct.Struct('<I')
+SHORT = struct.Struct('<H')
+
+
+def status_code(result) -> int:
+    status = result.get('status') if isinstance(result, dict) else None
+    return STATUSES.index(status) if status in STATUSES[:3] else STATUSES.index('other')
+
+
+class JournalWriter:
+    """Thread-safe writer that rotates files and bounds the journal's disk use"""
+
+    def __init__(self, directory: str, max_file_bytes: int = 64 * 1024 * 1024, max_total_bytes: int = 1024 ** 3):
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, method: str, params: tuple, client: str, arrival: float, wait: float, run: float, status: int):
+        args = zlib.compress(xmlrpc.client.dumps(tuple(params), allow_none=True).encode())
+        method = method.encode()
+        client = client.encode()
+        body = (
+            HEADER.pack(arrival, wait, run, status)
+            + SHORT.pack(len(method)) + method
+            + SHORT.pack(len(client)) + client
+            + LENGTH.pack(len(args)) + args
+        )
+
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_file_bytes:
+                self._rotate()
+            self._file.write(LENGTH.pack(len(body)) + body)
+            self._file.flush()
+
+    def _rotate(self):
+        if self._file:
+            self._file.close()
+        path = os.path.join(self.directory, f'journal-{time.strftime("%Y%m%d-%H%M%S")}-{time.time_ns() % 10**9:09d}.fcj')
+        self._file = open(path, 'ab')
+        self._file.write(MAGIC)
+
+        # Oldest first, never the file just opened
+        files = sorted(glob.glob(os.path.join(self.directory, 'journal-*.fcj')))
+        total = sum(os.path.getsize(f) for f in files)
+        for old in files[:-1]:
+            if total <= self.max_total_bytes:
+                break
+            total -= os.path.getsize(old)
+            os.remove(old)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def read(path: str):
+    """Yield every record of a journal file, or of every file in a journal directory in order"""
+    paths = sorted(glob.glob(os.path.join(path, 'journal-*.fcj'))) if os.path.isdir(path) else [path]
+    for file in paths:
+        with open(file, 'rb') as stream:
+            if stream.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f'{file} is not a journal file')
+            while True:
+                length = stream.read(LENGTH.size)
+                if len(length) < LENGTH.size:
+                    break
+                body = stream.read(LENGTH.unpack(length)[0])
+                if len(body) < LENGTH.unpack(length)[0]:
+                    # Truncated by a crash mid-write
+                    break
+                yield _decode(body)
+
+
+def _decode(body: bytes) -> dict:
+    arrival, wait, run, status = HEADER.unpack_from(body)
+    offset = HEADER.size
+    fields = []
+    for size in (SHORT, SHORT, LENGTH):
+        length = size.unpack_from(body, offset)[0]
+        offset += size.size
+        fields.append(body[offset:offset + length])
+        offset += length
+    method, client, args = fields
+    params, _ = xmlrpc.client.loads(zlib.decompress(args).decode(), use_builtin_types=True)
+    return {
+        'method': method.decode(), 'params': params, 'client': client.decode(), 'arrival': arrival,
+        'wait': wait, 'run': run, 'status': STATUSES[status]
+    }
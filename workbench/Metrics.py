@@ -0,0 +1,41 @@
+"""
+Counters and timings reported by the get_metrics RPC.
+"""
+
+import threading
+
+
+class Metrics:
+    """Thread-safe named counters and timers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        # name -> [count, total seconds, max seconds]
+        self._timers = {}
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def time(self, name: str, seconds: float):
+        with self._lock:
+            timer = self._timers.setdefault(name, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def hit_rate(self, hits: str, misses: str) -> float | None:
+        with self._lock:
+            total = self._counters.get(hits, 0) + self._counters.get(misses, 0)
+            return self._counters.get(hits, 0) / total if total else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'timers': {
+                    name: {'count': count, 'total': total, 'mean': total / count, 'max': longest}
+                    for name, (count, total, longest) in self._timers.items()
+                }
+            }
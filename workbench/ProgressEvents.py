@@ -0,0 +1,81 @@
+"""
+Progress events for long-running RPC calls.
+
+The main thread publishes events and clients long-poll for them. Publishing never
+blocks: each subscriber has its own bounded buffer and once it is full the oldest
+events are dropped (and counted), so a slow or vanished consumer can't stall FreeCAD.
+"""
+
+import itertools
+import threading
+import time
+
+from collections import deque
+
+
+class Subscriber:
+
+    def __init__(self, token: str | None, max_events: int):
+        self.token = token
+        self.events = deque(maxlen=max_events)
+        self.dropped = 0
+        self.last_poll = time.monotonic()
+
+
+class EventStream:
+    """Fan-out of progress events to bounded per-subscriber buffers"""
+
+    def __init__(self, max_events: int = 256, idle_timeout: float = 300.0):
+        self.max_events = max_events
+        self.idle_timeout = idle_timeout
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+
+    def subscribe(self, token: str | None = None) -> int:
+        """Subscribe to events for one call token, or to every event if token is None"""
+        with self._condition:
+            self._expire()
+            subscriber_id = next(self._ids)
+            self._subscribers[subscriber_id] = Subscriber(token, self.max_events)
+            return subscriber_id
+
+    def unsubscribe(self, subscriber_id: int):
+        with self._condition:
+            self._subscribers.pop(subscriber_id, None)
+
+    def publish(self, token: str | None, event: str, **data):
+        entry = {'token': token, 'event': event, 'time': time.time(), **data}
+        with self._condition:
+            for subscriber in self._subscribers.values():
+                if subscriber.token is not None and subscriber.token != token:
+                    continue
+                if len(subscriber.events) == subscriber.events.maxlen:
+                    subscriber.dropped += 1
+                subscriber.events.append(entry)
+            self._condition.notify_all()
+
+    def poll(self, subscriber_id: int, timeout: float = 1.0) -> dict | None:
+        """Wait up to timeout seconds for events and return everything buffered"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            subscriber = self._subscribers.get(subscriber_id)
+            if subscriber is None:
+                return None
+            while not subscriber.events:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or subscriber_id not in self._subscribers:
+                    break
+                self._condition.wait(remaining)
+
+            events = list(subscriber.events)
+            subscriber.events.clear()
+            dropped, subscriber.dropped = subscriber.dropped, 0
+            subscriber.last_poll = time.monotonic()
+            return {'events': events, 'dropped': dropped}
+
+    def _expire(self):
+        # Drop subscribers whose client went away without unsubscribing
+        cutoff = time.monotonic() - self.idle_timeout
+        for subscriber_id in [i for i, s in self._subscribers.items() if s.last_poll < cutoff]:
+            del self._subscribers[subscriber_id]
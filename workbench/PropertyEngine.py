@@ -0,0 +1,294 @@
+"""
+Applies property dictionaries from RPC calls to FreeCAD objects.
+
+Each FreeCAD property type maps to a converter, looked up once per type and cached.
+Which properties an object has, and whether they are read-only, is read from the
+object itself every time, since dynamic properties and editor modes differ between
+objects of the same type. A property dict is checked in full before anything is
+set, so a bad payload fails with every problem listed at once instead of
+half-applying.
+"""
+
+import functools
+
+import FreeCAD
+
+VECTOR_TYPES = {
+    'App::PropertyVector', 'App::PropertyVectorDistance', 'App::PropertyPosition',
+    'App::PropertyDirection', 'App::PropertyAcceleration', 'App::PropertyVelocity'
+}
+LINK_TYPES = {
+    'App::PropertyLink', 'App::PropertyLinkChild', 'App::PropertyLinkGlobal', 'App::PropertyLinkHidden'
+}
+LINK_LIST_TYPES = {
+    'App::PropertyLinkList', 'App::PropertyLinkListChild', 'App::PropertyLinkListGlobal', 'App::PropertyLinkListHidden'
+}
+# Single links that may also name sub-elements (faces, edges, ...) of the linked object
+LINK_SUB_TYPES = {
+    'App::PropertyLinkSub', 'App::PropertyLinkSubChild', 'App::PropertyLinkSubGlobal', 'App::PropertyLinkSubHidden',
+    'App::PropertyXLink', 'App::PropertyXLinkSub', 'App::PropertyXLinkContainer'
+}
+LINK_SUB_LIST_TYPES = {
+    'App::PropertyLinkSubList', 'App::PropertyLinkSubListChild', 'App::PropertyLinkSubListGlobal',
+    'App::PropertyLinkSubListHidden', 'App::PropertyXLinkSubList', 'App::PropertyXLinkList'
+}
+COLOR_TYPES = {'App::PropertyColor'}
+COLOR_LIST_TYPES = {'App::PropertyColorList'}
+PLACEMENT_TYPES = {'App::PropertyPlacement'}
+ENUM_TYPES = {'App::PropertyEnumeration'}
+INTEGER_TYPES = {'App::PropertyInteger', 'App::PropertyIntegerConstraint', 'App::PropertyPercent'}
+BOOL_TYPES = {'App::PropertyBool'}
+STRING_TYPES = {'App::PropertyString', 'App::PropertyFont', 'App::PropertyFile', 'App::PropertyPath'}
+FILLET_EDGE_TYPES = {'Part::PropertyFilletEdges'}
+
+
+def _to_vector(value, name: str, document=None):
+    if isinstance(value, dict):
+        return FreeCAD.Vector(float(value.get('x', 0)), float(value.get('y', 0)), float(value.get('z', 0)))
+    if isinstance(value, (list, tuple)) and len(value) == 3:
+        return FreeCAD.Vector(*(float(v) for v in value))
+    raise ValueError(f'{name}: expected {{"x", "y", "z"}} or [x, y, z], got {value!r}')
+
+
+def _to_placement(value, name: str, document=None):
+    if not isinstance(value, dict):
+        raise ValueError(f'{name}: expected {{"Base": ..., "Rotation": ...}}, got {value!r}')
+
+    unknown = set(value) - {'Base', 'Rotation'}
+    if unknown:
+        raise ValueError(f'{name}: unknown keys {sorted(unknown)}, expected Base and Rotation')
+
+    position = _to_vector(value.get('Base', {}), f'{name}.Base')
+
+    rotation = value.get('Rotation', {})
+    if not isinstance(rotation, dict):
+        raise ValueError(f'{name}.Rotation: expected {{"Axis": ..., "Angle": ...}}, got {rotation!r}')
+    if rotation:
+        axis = _to_vector(rotation.get('Axis', {'x': 0, 'y': 0, 'z': 1}), f'{name}.Rotation.Axis')
+        if axis.Length == 0:
+            raise ValueError(f'{name}.Rotation.Axis: axis must not be zero-length')
+        rotation = FreeCAD.Rotation(axis.normalize(), float(rotation.get('Angle', 0)))
+    else:
+        rotation = FreeCAD.Rotation(0, 0, 0)
+
+    return FreeCAD.Placement(position, rotation)
+
+
+def _to_color(value, name: str, document=None):
+    if not isinstance(value, (list, tuple)) or len(value) not in (3, 4):
+        raise ValueError(f'{name}: expected [r, g, b] or [r, g, b, a], got {value!r}')
+    color = tuple(float(v) for v in value)
+    # Accept 0-255 colors as well as 0-1 colors
+    if any(v > 1 for v in color):
+        color = tuple(v / 255 for v in color)
+    return color
+
+
+def _to_bool(value, name: str, document=None):
+    if not isinstance(value, bool):
+        raise ValueError(f'{name}: expected true or false, got {value!r}')
+    return value
+
+
+def _to_int(value, name: str, document=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or int(value) != value:
+        raise ValueError(f'{name}: expected an integer, got {value!r}')
+    return int(value)
+
+
+def _to_string(value, name: str, document=None):
+    if not isinstance(value, str):
+        raise ValueError(f'{name}: expected a string, got {value!r}')
+    return value
+
+
+def _to_fillet_edges(value, name: str, document=None):
+    # JSON has no tuples but FreeCAD only accepts (edge, radius1, radius2) tuples
+    try:
+        return [(int(edge[0]), float(edge[1]), float(edge[2])) for edge in value]
+    except (TypeError, ValueError, IndexError):
+        raise ValueError(f'{name}: expected [[edge, radius1, radius2], ...], got {value!r}')
+
+
+def _to_color_list(value, name: str, document=None):
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f'{name}: expected a list of colors, got {value!r}')
+    return [_to_color(v, name) for v in value]
+
+
+def _to_enum(value, name: str, document=None, options: list | None = None):
+    if options and value not in options and value not in range(len(options)):
+        raise ValueError(f'{name}: {value!r} is not one of {options}')
+    return value
+
+
+def _to_link(value, name: str, document=None):
+    if value is None:
+        return None
+    linked = document.getObject(value) if isinstance(value, str) else None
+    if not linked:
+        raise ValueError(f'{name}: object "{value}" not found')
+    return linked
+
+
+def _to_link_list(value, name: str, document=None):
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f'{name}: expected a list of object names, got {value!r}')
+    return [_to_link(v, name, document) for v in value]
+
+
+def _to_link_sub(value, name: str, document=None):
+    # "Box" links the whole object, ["Box", ["Face1", "Edge2"]] (or ["Box", "Face1"]) some of its elements
+    if value is None or isinstance(value, str):
+        return _to_link(value, name, document)
+    if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], str):
+        subs = [value[1]] if isinstance(value[1], str) else value[1]
+        if isinstance(subs, (list, tuple)) and all(isinstance(sub, str) for sub in subs):
+            return (_to_link(value[0], name, document), list(subs))
+    raise ValueError(f'{name}: expected an object name or [name, [subelements]], got {value!r}')
+
+
+def _to_link_sub_list(value, name: str, document=None):
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f'{name}: expected a list of object names or [name, [subelements]] pairs, got {value!r}')
+    return [_to_link_sub(v, name, document) for v in value]
+
+
+def _as_is(value, name: str, document=None):
+    # Floats and quantities (Length, Angle, ...) accept numbers or strings like "10 mm" as is
+    return value
+
+
+CONVERTERS = [
+    (PLACEMENT_TYPES, _to_placement), (VECTOR_TYPES, _to_vector), (COLOR_TYPES, _to_color),
+    (COLOR_LIST_TYPES, _to_color_list), (LINK_TYPES, _to_link), (LINK_LIST_TYPES, _to_link_list),
+    (LINK_SUB_TYPES, _to_link_sub), (LINK_SUB_LIST_TYPES, _to_link_sub_list), (ENUM_TYPES, _to_enum),
+    (BOOL_TYPES, _to_bool), (INTEGER_TYPES, _to_int), (STRING_TYPES, _to_string),
+    (FILLET_EDGE_TYPES, _to_fillet_edges)
+]
+# Property type -> converter
+_converters = {}
+
+
+def converter(type_id: str):
+    """Converter for a FreeCAD property type, found once and cached"""
+    if type_id not in _converters:
+        _converters[type_id] = next((convert for types, convert in CONVERTERS if type_id in types), _as_is)
+    return _converters[type_id]
+
+
+class PropertySpec:
+    """What the engine knows about a single property of an object"""
+
+    def __init__(self, name: str, type_id: str, group: str, doc: str, read_only: bool, enum: list | None):
+        self.name = name
+        self.type_id = type_id
+        self.group = group
+        self.doc = doc
+        self.read_only = read_only
+        self.enum = enum
+        self.converter = converter(type_id)
+        if type_id in ENUM_TYPES:
+            self.converter = functools.partial(self.converter, options=enum)
+
+    def convert(self, value, document):
+        return self.converter(value, self.name, document)
+
+    def to_dict(self) -> dict:
+        spec = {'type': self.type_id, 'group': self.group, 'doc': self.doc, 'read_only': self.read_only}
+        if self.enum is not None:
+            spec['enum'] = self.enum
+        return spec
+
+
+class PropertyEngine:
+    """Validates and applies property dictionaries against each object's own properties"""
+
+    def __init__(self):
+        # Requested type name -> serialized schema, for get_type_schema
+        self._type_schemas = {}
+
+    def spec(self, container, name: str) -> PropertySpec:
+        """What one property of an object or view provider currently accepts"""
+        type_id = container.getTypeIdOfProperty(name)
+        read_only = 'ReadOnly' in container.getEditorMode(name) or 'ReadOnly' in container.getPropertyStatus(name)
+        enum = None
+        if type_id in ENUM_TYPES:
+            try:
+                enum = list(container.getEnumerationsOfProperty(name))
+            except Exception:
+                enum = None
+        return PropertySpec(
+            name, type_id, container.getGroupOfProperty(name),
+            container.getDocumentationOfProperty(name), read_only, enum
+        )
+
+    def schema(self, container) -> dict:
+        """Property specs for every property of an object or view provider"""
+        return {name: self.spec(container, name) for name in container.PropertiesList}
+
+    def type_schema(self, object) -> dict:
+        """Serializable schema for an object and, if the GUI is up, its view provider"""
+        result = {
+            'type': object.TypeId,
+            'properties': {name: spec.to_dict() for name, spec in self.schema(object).items()}
+        }
+        if getattr(object, 'ViewObject', None) is not None:
+            result['view_properties'] = {name: spec.to_dict() for name, spec in self.schema(object.ViewObject).items()}
+        return result
+
+    def type_schema_for(self, object_type: str) -> dict:
+        """Serializable schema for a type name, introspected on a throwaway object the first time"""
+        if object_type not in self._type_schemas:
+            # Creating a document makes it the active one, so hand the user's back afterwards
+            active = FreeCAD.ActiveDocument
+            doc = FreeCAD.newDocument('TypeSchema', hidden=True)
+            try:
+                self._type_schemas[object_type] = self.type_schema(doc.addObject(object_type, 'Schema'))
+            finally:
+                FreeCAD.closeDocument(doc.Name)
+                if active is not None:
+                    FreeCAD.setActiveDocument(active.Name)
+        return self._type_schemas[object_type]
+
+    def apply(self, object, properties: dict):
+        """Validate every property first, then set them all; raises ValueError listing all problems"""
+        changes = []
+        errors = []
+
+        names = set(object.PropertiesList)
+        for key, value in properties.items():
+            if key == 'ViewObject':
+                continue
+            self._prepare(object, names, key, value, object.Document, changes, errors)
+
+        view = properties.get('ViewObject')
+        view_changes = []
+        if view is not None:
+            if not isinstance(view, dict):
+                errors.append(f'ViewObject: expected a dictionary, got {view!r}')
+            elif getattr(object, 'ViewObject', None) is not None:
+                view_names = set(object.ViewObject.PropertiesList)
+                for key, value in view.items():
+                    self._prepare(object.ViewObject, view_names, key, value, object.Document, view_changes, errors, 'ViewObject.')
+
+        if errors:
+            raise ValueError(f'Invalid properties for {object.TypeId}: ' + '; '.join(errors))
+
+        for key, value in changes:
+            setattr(object, key, value)
+        for key, value in view_changes:
+            setattr(object.ViewObject, key, value)
+
+    def _prepare(self, container, names: set, key: str, value, document, changes: list, errors: list, prefix: str = ''):
+        if key not in names:
+            errors.append(f'{prefix}{key}: unknown property')
+            return
+        spec = self.spec(container, key)
+        if spec.read_only:
+            errors.append(f'{prefix}{key}: property is read-only')
+            return
+        try:
+            changes.append((key, spec.convert(value, document)))
+        except (TypeError, ValueError) as e:
+            errors.append(f'{prefix}{e}')
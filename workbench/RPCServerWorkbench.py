@@ -9,8 +9,7 @@ Tentative FreeCAD object structure (docs are lacking tbh):
     'object_properties': {
         'Placement': {
             'Base': {'x': number, 'y': number, 'z': number},
-            'Angle': number,
-            'Rotation': {'Axis': {'x': number, 'y': number, 'z': number}}
+            'Rotation': {'Axis': {'x': number, 'y': number, 'z': number}, 'Angle': number}
         },
         'ViewObject': {'ShapeColor': [r, g, b, a]},
         'Length': number,
@@ -30,30 +29,115 @@ Tentative Object Types:
 
 """
 
+import os
 import threading
+import time
 import queue
+import shutil
 import FreeCAD
+import FreeCADGui
+import Journal
+import BooleanEngine
+import ExportPipeline
+import Tessellation
+import ViewRenderer
+
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 from PySide2 import QtCore
-from xmlrpc.server import SimpleXMLRPCServer
+from PropertyEngine import PropertyEngine
+from ProgressEvents import EventStream
+from FCStdIndex import FCStdIndex
+from Metrics import Metrics
+from ShapeAnalysis import ShapeAnalyzer
+from socketserver import ThreadingMixIn
+from xmlrpc.client import Binary
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+# Event stream plumbing isn't worth journaling (and long-polls would swamp the timings)
+UNJOURNALED_METHODS = {'subscribe', 'poll_events', 'unsubscribe'}
+
+class RequestHandler(SimpleXMLRPCRequestHandler):
+    # Meshes are also served raw at /mesh/<mesh_id>, since base64 inside XML costs more than meshing
+    def do_GET(self):
+        mesh = None
+        methods = self.server.rpc_server.methods
+        if methods and self.path.startswith('/mesh/'):
+            mesh = methods.meshes.find(self.path[len('/mesh/'):])
+        if mesh is None:
+            self.report_404()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(mesh.buffer)))
+        self.end_headers()
+        self.wfile.write(mesh.buffer)
+
+class ThreadingXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    # Lets clients long-poll for progress while another call waits on the main thread
+    daemon_threads = True
+
+    def __init__(self, rpc_server, *args, **kwargs):
+        self.rpc_server = rpc_server
+        super().__init__(*args, **kwargs)
+
+    def process_request_thread(self, request, client_address):
+        self.rpc_server.local.client = f'{client_address[0]}:{client_address[1]}'
+        super().process_request_thread(request, client_address)
+
+    def _dispatch(self, method, params):
+        journal = self.rpc_server.journal
+        if journal is None or method in UNJOURNALED_METHODS:
+            return super()._dispatch(method, params)
+
+        # The MCP server wraps its calls in track() for progress, so record the call it carries
+        name, args = method, params
+        if method == 'track' and len(params) == 3 and isinstance(params[1], str):
+            name, args = params[1], tuple(params[2])
+
+        local = self.rpc_server.local
+        local.wait = 0.0
+        arrival = time.time()
+        start = time.perf_counter()
+        status = Journal.STATUSES.index('exception')
+        try:
+            result = super()._dispatch(method, params)
+            status = Journal.status_code(result)
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            journal.record(name, args, getattr(local, 'client', ''), arrival, local.wait, elapsed - local.wait, status)
 
 class RPCServer:
     
-    def __init__(self, host: str = '127.0.0.1', port:int = 8765):
+    def __init__(self, host: str = '127.0.0.1', port:int = 8765, timeout: float = 60.0, journal_dir: str | None = None):
         self.host = host
         self.port = port
+        self.timeout = timeout
+        # Set FREECAD_MCP_JOURNAL to a directory to record every call for replay.py
+        self.journal_dir = journal_dir or os.environ.get('FREECAD_MCP_JOURNAL')
+        self.journal = None
+        self.methods = None
         self.server = None
         self.thread = None
         self.running = False
         self.request_queue = queue.Queue()
+        self.events = EventStream()
+        # Token of the tracked call the main thread is running, if any
+        self.current_token = None
+        self.local = threading.local()
     
     def start(self):
         if self.running:
             return False
         
         try:
-            self.server = SimpleXMLRPCServer((self.host, self.port), allow_none=True)
-            self.server.register_instance(FreeCADRPCMethods(self))
+            self.server = ThreadingXMLRPCServer(self, (self.host, self.port), requestHandler=RequestHandler, allow_none=True)
+            self.methods = FreeCADRPCMethods(self)
+            self.server.register_instance(self.methods)
+            if self.journal_dir:
+                self.journal = Journal.JournalWriter(self.journal_dir)
+                FreeCAD.Console.PrintMessage(f'Recording RPC journal in {self.journal_dir}\n')
             
             self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.thread.start()
@@ -71,18 +155,48 @@ class RPCServer:
         if not self.running:
             return
         
-        try:
-            while not self.request_queue.empty():
-                func, args = self.request_queue.get_nowait()
-                func(*args)
-        except Exception as e:
-            FreeCAD.Console.PrintError(f'Error in poll: {str(e)}\n')
+        while not self.request_queue.empty():
+            func, args, future, token, queued_at = self.request_queue.get_nowait()
+            self.current_token = token
+            self.progress('started')
+            started_at = time.perf_counter()
+            try:
+                result = func(*args)
+            except Exception as e:
+                FreeCAD.Console.PrintError(f'Error in poll: {str(e)}\n')
+                result = {'status': 'error', 'message': str(e)}
+            self.progress('done', status=result.get('status') if isinstance(result, dict) else None)
+            self.current_token = None
+            future.wait = started_at - queued_at
+            future.set_result(result)
         
         if self.running:
             QtCore.QTimer.singleShot(10, self._poll)
     
-    def _queue(self, func, *args):
-        self.request_queue.put((func, args))
+    def _enqueue(self, func, args: tuple, future: Future):
+        token = getattr(self.local, 'token', None)
+        self.request_queue.put((func, args, future, token, time.perf_counter()))
+        self.events.publish(token, 'queued', position=self.request_queue.qsize())
+
+    def progress(self, event: str, **data):
+        """Publish a progress event for the current call (on the main thread or an RPC thread)"""
+        if threading.current_thread() is threading.main_thread():
+            token = self.current_token
+        else:
+            token = getattr(self.local, 'token', None)
+        self.events.publish(token, event, **data)
+
+    def _call(self, func, *args) -> dict:
+        """Queue func for the main thread and wait for its result"""
+        future = Future()
+        self._enqueue(func, args, future)
+        try:
+            result = future.result(timeout=self.timeout)
+            # Time spent queued behind other calls, for the journal
+            self.local.wait = getattr(self.local, 'wait', 0.0) + future.wait
+            return result
+        except FutureTimeoutError:
+            return {'status': 'queued', 'message': f'Still running after {self.timeout} seconds.'}
 
     def stop(self):
         if not self.running:
@@ -91,6 +205,12 @@ class RPCServer:
         try:
             if self.server:
                 self.server.shutdown()
+            if self.journal:
+                self.journal.close()
+                self.journal = None
+            if self.methods:
+                self.methods._close()
+                self.methods = None
             self.running = False
             FreeCAD.Console.PrintMessage('FreeCAD RPC Server stopped\n')
             return True
@@ -100,13 +220,146 @@ class RPCServer:
 
 class FreeCADRPCMethods:
     """RPC methods for FreeCAD"""
+
+    # Operations that can be grouped with batch()
+    BATCH_METHODS = {
+        'new_object', 'update_object', 'delete_object', 'update_edges',
+        'create_sketch', 'add_sketch_circle', 'add_sketch_rectangle', 'extrude'
+    }
     
     def __init__(self, rpc_server: RPCServer):
         self.rpc_server = rpc_server
+        self.properties = PropertyEngine()
+        self.analyzer = ShapeAnalyzer()
+        self.exports = ExportPipeline.ExportCache()
+        self.meshes = Tessellation.MeshCache()
+        self.file_index = FCStdIndex()
+        self.metrics = Metrics()
+        self.renders = ViewRenderer.RenderCache()
+        self.revisions = ViewRenderer.DocumentRevisions()
+        FreeCAD.addDocumentObserver(self.revisions)
+        FreeCADGui.addDocumentObserver(self.revisions)
+        # Document name -> objects that were already invalid when its transaction opened
+        self._transactions = {}
+        # Documents with a batch in progress (recompute is deferred until the end)
+        self._batches = set()
+
+    def _close(self):
+        FreeCAD.removeDocumentObserver(self.revisions)
+        FreeCADGui.removeDocumentObserver(self.revisions)
+
+    def _transaction(self, document_name: str, name: str, func, *args) -> dict:
+        """Run func inside a document transaction, rolling back everything it did if it fails"""
+        try:
+            doc = FreeCAD.getDocument(document_name)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+        # Nested calls (e.g. operations in a batch) join the outer transaction
+        if document_name in self._transactions:
+            return func(*args)
+
+        self._transactions[document_name] = self._invalid_objects(doc)
+        doc.openTransaction(name)
+        try:
+            result = func(*args)
+        except Exception as e:
+            result = {'status': 'error', 'message': str(e)}
+        finally:
+            del self._transactions[document_name]
+
+        if result.get('status') == 'error':
+            doc.abortTransaction()
+            doc.recompute()
+            FreeCAD.Console.PrintError(f"'{name}' failed, changes rolled back.\n")
+            return {**result, 'transaction': name, 'rolled_back': True}
+
+        doc.commitTransaction()
+        return result
+
+    def _invalid_objects(self, doc) -> set:
+        return {object.Name for object in doc.Objects if 'Invalid' in object.State}
+
+    def _recompute(self, doc) -> dict | None:
+        """Recompute doc (unless a batch is deferring it) and return an error if any object broke"""
+        if doc.Name in self._batches:
+            return None
+
+        self.rpc_server.progress('recompute_started', document=doc.Name)
+        doc.recompute()
+        self.rpc_server.progress('recompute_finished', document=doc.Name)
+        broken = self._invalid_objects(doc) - self._transactions.get(doc.Name, set())
+        if broken:
+            return {'status': 'error', 'message': f'Recompute failed for: {", ".join(sorted(broken))}'}
+        return None
+
+    # Methods that can't be wrapped by track()
+    UNTRACKED_METHODS = {'track', 'subscribe', 'poll_events', 'unsubscribe'}
+
+    def track(self, token: str, method: str, params: list) -> dict:
+        """Call another RPC method, tagging its progress events with token"""
+        if method.startswith('_') or method in self.UNTRACKED_METHODS or not hasattr(self, method):
+            return {'status': 'error', 'message': f'Unknown method "{method}"'}
+        self.rpc_server.local.token = token
+        try:
+            return getattr(self, method)(*params)
+        finally:
+            self.rpc_server.local.token = None
+
+    def subscribe(self, token: str = '') -> dict:
+        """Start buffering progress events for one call token (or for every call if empty)"""
+        return {'status': 'success', 'subscriber': self.rpc_server.events.subscribe(token or None)}
+
+    def poll_events(self, subscriber: int, timeout: float = 1.0) -> dict:
+        """Wait up to timeout seconds for progress events"""
+        result = self.rpc_server.events.poll(subscriber, min(timeout, 30.0))
+        if result is None:
+            return {'status': 'error', 'message': 'Unknown subscriber'}
+        return {'status': 'success', **result}
+
+    def unsubscribe(self, subscriber: int) -> dict:
+        self.rpc_server.events.unsubscribe(subscriber)
+        return {'status': 'success'}
+
+    def batch(self, document_name: str, operations: list) -> dict:
+        """Run several operations as a single undo step, rolling all of them back if any fails"""
+        return self.rpc_server._call(self._transaction, document_name, 'Batch', self._batch, document_name, operations)
+
+    def _batch(self, document_name: str, operations: list) -> dict:
+        doc = FreeCAD.getDocument(document_name)
+        results = []
+
+        self._batches.add(document_name)
+        try:
+            for index, operation in enumerate(operations):
+                method = operation.get('method')
+                if method not in self.BATCH_METHODS:
+                    return {'status': 'error', 'message': f'Unsupported batch method "{method}"', 'index': index}
+
+                # Arguments can be positional or keyword, minus the document name
+                args = operation.get('args', [])
+                func = getattr(self, f'_{method}')
+                if isinstance(args, dict):
+                    result = func(document_name, **args)
+                else:
+                    result = func(document_name, *args)
+
+                if result.get('status') == 'error':
+                    return {**result, 'index': index, 'method': method}
+                results.append(result)
+                self.rpc_server.progress('batch_progress', method=method, progress=index + 1, total=len(operations))
+        finally:
+            self._batches.discard(document_name)
+
+        error = self._recompute(doc)
+        if error:
+            return error
+
+        FreeCAD.Console.PrintMessage(f"Batch of {len(results)} operations applied.\n")
+        return {'status': 'success', 'results': results}
 
     def new_document(self, name: str = 'Unnamed') -> dict:
-        self.rpc_server._queue(self._new_document, name)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._new_document, name)
     
     def _new_document(self, name: str) -> dict:
         try:
@@ -134,40 +387,33 @@ class FreeCADRPCMethods:
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
     
+    def get_type_schema(self, object_type: str) -> dict:
+        """Properties of an object type with their FreeCAD types, groups, docs and allowed values"""
+        return self.rpc_server._call(self._get_type_schema, object_type)
+
+    def _get_type_schema(self, object_type: str) -> dict:
+        try:
+            return {'status': 'success', **self.properties.type_schema_for(object_type)}
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error getting schema for '{object_type}': {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
     def new_object(self, document_name: str, object_name: str, object_type: str, properties: dict | None = None) -> dict:
         if properties is None:
             properties = {}
-        self.rpc_server._queue(self._new_object, document_name, object_name, object_type, properties)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Create {object_name}', self._new_object, document_name, object_name, object_type, properties)
     
-    def _new_object(self, document_name: str, object_name: str, object_type: str, properties: dict) -> dict:
+    def _new_object(self, document_name: str, object_name: str, object_type: str, properties: dict | None = None) -> dict:
+        if properties is None:
+            properties = {}
         try:
             doc = FreeCAD.getDocument(document_name)
             object = doc.addObject(object_type, object_name)
-            for key, value in properties.items():
-
-                # Placement has to be set to specific object types
-                if key == "Placement":
-                    self._set_placement(object, value)
-                
-                # ShapeColor is a child of ViewObject
-                elif key == "ViewObject":
-                    self._set_view(object, value)
-
-                # Certain objects link to existing objects
-                elif key == "Base":
-                    base_object = doc.getObject(value)
-                    if (base_object):
-                        setattr(object, key, base_object)
-                    else:
-                        FreeCAD.Console.PrintMessage(f"Base object not found.\n")
-                        return {'status': 'error', 'message': 'Base object not found.'}
-
-                # Catch-all
-                elif hasattr(object, key):
-                    setattr(object, key, value)
+            self.properties.apply(object, properties)
 
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Object '{object_name}' created.\n")
             return {'status': 'success', 'object': object.Name}
         except Exception as e:
@@ -175,40 +421,21 @@ class FreeCADRPCMethods:
             return {'status': 'error', 'message': str(e)}
         
     def update_object(self, document_name: str, object_name: str, properties: dict | None = None) -> dict:
-        self.rpc_server._queue(lambda: self._update_object(document_name, object_name, properties))
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Update {object_name}', self._update_object, document_name, object_name, properties)
 
     def _update_object(self, document_name: str, object_name: str, properties: dict | None = None) -> dict:
+        if properties is None:
+            properties = {}
         try:
             doc = FreeCAD.getDocument(document_name)
             object = doc.getObject(object_name)
             if not object:
                 return {'status': 'error', 'message': 'Object not found.'}
+            self.properties.apply(object, properties)
 
-            for key, value in properties.items():
-
-                # Placement has to be set to specific object types
-                if key == "Placement":
-                    self._set_placement(object, value)
-                
-                # ShapeColor is a child of ViewObject
-                elif key == "ViewObject":
-                    self._set_view(object, value)
-                
-                # Stuff like fillets are new objects that link to existing objects
-                elif key == "Base":
-                    base_object = doc.getObject(value)
-                    if (base_object):
-                        setattr(object, key, base_object)
-                    else:
-                        FreeCAD.Console.PrintMessage(f"Base object not found.\n")
-                        return {'status': 'error', 'message': 'Base object not found.'}
-                    
-                # Catch-all
-                elif hasattr(object, key):
-                    setattr(object, key, value)
-
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Object '{object_name}' updated.\n")
             return {'status': 'success', 'object': object.Name}
         except Exception as e:
@@ -216,8 +443,7 @@ class FreeCADRPCMethods:
             return {'status': 'error', 'message': str(e)}
     
     def delete_object(self, document_name: str, object_name: str) -> dict:
-        self.rpc_server._queue(lambda: self._delete_object(document_name, object_name))
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Delete {object_name}', self._delete_object, document_name, object_name)
     
     def _delete_object(self, document_name: str, object_name: str) -> dict:
         try:
@@ -226,50 +452,17 @@ class FreeCADRPCMethods:
             if not object:
                 return {'status': 'error', 'message': 'Object not found.'}
             doc.removeObject(object_name)
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Object '{object_name}' deleted.\n")
+            return {'status': 'success', 'object': object_name}
         except Exception as e:
             FreeCAD.Console.PrintError(f"Failed to delete '{object_name}'.\n")
             return {'status': 'error', 'message': str(e)}
 
-    def _set_placement(self, object, placement: dict):
-        try:
-            from FreeCAD import Placement, Vector, Rotation
-
-            base = placement.get('Base', {})
-            position = Vector(base.get('x', 0), base.get('y', 0), base.get('z', 0))
-
-            rotation = placement.get('Rotation', {})
-            if (rotation):
-                axis = rotation.get('Axis', {'x': 0, 'y': 0, 'z': 0})
-                angle = rotation.get('Angle', 0)
-                axis_vector = Vector(axis['x'], axis['y'], axis['z'])
-                if (axis_vector.Length > 0):
-                    axis = axis_vector.normalize()
-                rotation = Rotation(axis, angle)
-            else:
-                rotation = Rotation(0, 0, 0)
-            
-            object.Placement = Placement(position, rotation)
-            FreeCAD.Console.PrintMessage(f"Placement set for '{object.Name}'\n")
-        except Exception as e:
-            FreeCAD.Console.PrintError(f"Failed to set placement: {e}\n")
-    
-    def _set_view(self, object, view: dict):
-        try:
-            for key, value in view.items():
-
-                # The value of ShapeColor has to be a tuple (L)
-                if key == "ShapeColor":
-                    setattr(object.ViewObject, key, (float(value[0]), float(value[1]), float(value[2]), float(value[3])))
-                else:
-                    setattr(object.ViewObject, key, value)
-        except Exception as e:
-            FreeCAD.Console.PrintError(f"Failed to set view properties: {e}\n")
-
     def update_edges(self, document_name: str, base_object_name: str, edge_type: str, edges: list) -> dict:
-        self.rpc_server._queue(self._update_edges, document_name, base_object_name, edge_type, edges)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'{edge_type} {base_object_name}', self._update_edges, document_name, base_object_name, edge_type, edges)
 
     def _update_edges(self, document_name: str, base_object_name: str, edge_type: str, edges: list) -> dict:
         try:
@@ -292,7 +485,9 @@ class FreeCADRPCMethods:
             edge_tuples = [tuple(edge) if isinstance(edge, list) else edge for edge in edges]
             edge_obj.Edges = edge_tuples
             
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Edge object '{object_name}' created with {len(edge_tuples)} edges.\n")
             return {'status': 'success', 'object': edge_obj.Name}
         except Exception as e:
@@ -301,10 +496,9 @@ class FreeCADRPCMethods:
         
     def create_sketch(self, document_name: str, sketch_name: str, plane: str = "XY") -> dict:
         """Create a new sketch on a specified plane"""
-        self.rpc_server._queue(self._create_sketch, document_name, sketch_name, plane)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Create {sketch_name}', self._create_sketch, document_name, sketch_name, plane)
 
-    def _create_sketch(self, document_name: str, sketch_name: str, plane: str) -> dict:
+    def _create_sketch(self, document_name: str, sketch_name: str, plane: str = "XY") -> dict:
         try:
             doc = FreeCAD.getDocument(document_name)
             
@@ -332,8 +526,7 @@ class FreeCADRPCMethods:
 
     def add_sketch_circle(self, document_name: str, sketch_name: str, center_x: float, center_y: float, radius: float) -> dict:
         """Add a circle to a sketch"""
-        self.rpc_server._queue(self._add_sketch_circle, document_name, sketch_name, center_x, center_y, radius)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Circle in {sketch_name}', self._add_sketch_circle, document_name, sketch_name, center_x, center_y, radius)
 
     def _add_sketch_circle(self, document_name: str, sketch_name: str, center_x: float, center_y: float, radius: float) -> dict:
         try:
@@ -343,14 +536,14 @@ class FreeCADRPCMethods:
             if not sketch or sketch.TypeId != 'Sketcher::SketchObject':
                 return {'status': 'error', 'message': f'Sketch "{sketch_name}" not found'}
             
-            doc.recompute()
-            
             from FreeCAD import Vector
             from Part import Circle
             center = Vector(center_x, center_y, 0)
             sketch.addGeometry(Circle(center, Vector(0, 0, 1), radius))
             
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Circle added to sketch at ({center_x}, {center_y}) with radius {radius}\n")
             return {'status': 'success', 'message': 'Circle added'}
         except Exception as e:
@@ -359,8 +552,7 @@ class FreeCADRPCMethods:
 
     def add_sketch_rectangle(self, document_name: str, sketch_name: str, x1: float, y1: float, x2: float, y2: float) -> dict:
         """Add a rectangle to a sketch (defined by two opposite corners)"""
-        self.rpc_server._queue(self._add_sketch_rectangle, document_name, sketch_name, x1, y1, x2, y2)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Rectangle in {sketch_name}', self._add_sketch_rectangle, document_name, sketch_name, x1, y1, x2, y2)
 
     def _add_sketch_rectangle(self, document_name: str, sketch_name: str, x1: float, y1: float, x2: float, y2: float) -> dict:
         try:
@@ -383,7 +575,9 @@ class FreeCADRPCMethods:
             sketch.addGeometry(LineSegment(p3, p4))
             sketch.addGeometry(LineSegment(p4, p1))
             
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Rectangle added to sketch from ({x1}, {y1}) to ({x2}, {y2})\n")
             return {'status': 'success', 'message': 'Rectangle added'}
         except Exception as e:
@@ -392,10 +586,9 @@ class FreeCADRPCMethods:
 
     def extrude(self, document_name: str, pad_name: str, sketch_name: str, length: float, symmetric: bool = False) -> dict:
         """Create a Pad (extrusion) from a sketch"""
-        self.rpc_server._queue(self._extrude, document_name, pad_name, sketch_name, length, symmetric)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._transaction, document_name, f'Pad {pad_name}', self._extrude, document_name, pad_name, sketch_name, length, symmetric)
 
-    def _extrude(self, document_name: str, pad_name: str, sketch_name: str, length: float, symmetric: bool) -> dict:
+    def _extrude(self, document_name: str, pad_name: str, sketch_name: str, length: float, symmetric: bool = False) -> dict:
         try:
             doc = FreeCAD.getDocument(document_name)
             sketch = doc.getObject(sketch_name)
@@ -414,16 +607,334 @@ class FreeCADRPCMethods:
             
             sketch.ViewObject.Visibility = False
             
-            doc.recompute()
+            error = self._recompute(doc)
+            if error:
+                return error
             FreeCAD.Console.PrintMessage(f"Pad '{pad_name}' created from sketch '{sketch_name}' with length {length}\n")
             return {'status': 'success', 'object': pad.Name}
         except Exception as e:
             FreeCAD.Console.PrintError(f"Error creating extrusion: {e}\n")
             return {'status': 'error', 'message': str(e)}
 
+    # Above this many operands, booleans are reduced in worker processes instead of as one parametric feature
+    PARALLEL_BOOLEAN_THRESHOLD = 32
+
+    def boolean(self, document_name: str, op: str, objects: list, result_name: str) -> dict:
+        """Fuse, cut or common many objects into one (for cut, the first object is the base)"""
+        if op not in BooleanEngine.OPERATIONS:
+            return {'status': 'error', 'message': f'Invalid op. Must be one of: {list(BooleanEngine.OPERATIONS)}'}
+        if len(objects) < 2:
+            return {'status': 'error', 'message': 'At least two objects are required.'}
+
+        transaction = f'{op.capitalize()} {result_name}'
+        if len(objects) <= self.PARALLEL_BOOLEAN_THRESHOLD:
+            return self.rpc_server._call(self._transaction, document_name, transaction, self._multi_boolean, document_name, op, objects, result_name)
+
+        # Only reading the shapes and adding the result need the main thread
+        shapes = self.rpc_server._call(self._shape_breps, document_name, objects)
+        if shapes.get('status') != 'success':
+            return shapes
+
+        try:
+            import Part
+
+            breps = shapes['breps']
+            progress = lambda level, remaining: self.rpc_server.progress('boolean_level', level=level, remaining=remaining)
+            if op == 'cut':
+                tools = BooleanEngine.tree_reduce('fuse', breps[1:], progress)
+                brep = BooleanEngine.combine('cut', [breps[0], tools])
+            else:
+                brep = BooleanEngine.tree_reduce(op, breps, progress)
+
+            shape = Part.Shape()
+            shape.importBrepFromString(brep)
+            if op == 'fuse':
+                shape = shape.removeSplitter()
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error computing {op}: {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+        return self.rpc_server._call(self._transaction, document_name, transaction, self._add_boolean_result, document_name, result_name, shape, objects)
+
+    def _shape_objects(self, doc, object_names: list) -> list:
+        objects = [doc.getObject(name) for name in object_names]
+        missing = [name for name, object in zip(object_names, objects) if not object]
+        if missing:
+            raise ValueError(f'Objects not found: {", ".join(missing)}')
+        shapeless = [object.Name for object in objects if not hasattr(object, 'Shape') or object.Shape.isNull()]
+        if shapeless:
+            raise ValueError(f'Objects without a shape: {", ".join(shapeless)}')
+        return objects
+
+    def _hide(self, objects: list):
+        for object in objects:
+            if object.ViewObject:
+                object.ViewObject.Visibility = False
+
+    def _multi_boolean(self, document_name: str, op: str, objects: list, result_name: str) -> dict:
+        try:
+            doc = FreeCAD.getDocument(document_name)
+            sources = self._shape_objects(doc, objects)
+
+            if op == 'cut':
+                # Cut only takes one tool, so several tools are fused first
+                tools = sources[1:]
+                if len(tools) > 1:
+                    tool = doc.addObject('Part::MultiFuse', f'{result_name}Tools')
+                    tool.Shapes = tools
+                    self._hide([tool])
+                else:
+                    tool = tools[0]
+                result = doc.addObject('Part::Cut', result_name)
+                result.Base = sources[0]
+                result.Tool = tool
+            else:
+                result = doc.addObject('Part::MultiFuse' if op == 'fuse' else 'Part::MultiCommon', result_name)
+                result.Shapes = sources
+            self._hide(sources)
+
+            error = self._recompute(doc)
+            if error:
+                return error
+            FreeCAD.Console.PrintMessage(f"Boolean '{result.Name}' created from {len(sources)} objects.\n")
+            return {'status': 'success', 'object': result.Name, 'operands': len(sources), 'method': 'feature'}
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error creating boolean: {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+    def _shape_breps(self, document_name: str, objects: list) -> dict:
+        try:
+            doc = FreeCAD.getDocument(document_name)
+            breps = [object.Shape.exportBrepToString() for object in self._shape_objects(doc, objects)]
+            return {'status': 'success', 'breps': breps}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def _add_boolean_result(self, document_name: str, result_name: str, shape, objects: list) -> dict:
+        try:
+            doc = FreeCAD.getDocument(document_name)
+            result = doc.addObject('Part::Feature', result_name)
+            result.Shape = shape
+            self._hide(self._shape_objects(doc, objects))
+
+            error = self._recompute(doc)
+            if error:
+                return error
+            FreeCAD.Console.PrintMessage(f"Boolean '{result.Name}' created from {len(objects)} objects.\n")
+            return {'status': 'success', 'object': result.Name, 'operands': len(objects), 'method': 'tree'}
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error creating boolean: {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+    def analyze(self, document_name: str, objects: list | None = None, interference: bool = True, tolerance: float = 1e-6) -> dict:
+        """
+        Mass properties for objects (by default every shape not used by another object)
+        and, optionally, which of them overlap by more than tolerance volume
+        """
+        shapes = self.rpc_server._call(self._shape_snapshot, document_name, objects or [])
+        if shapes.get('status') != 'success':
+            return shapes
+
+        # Shapes are immutable once taken from the document, so the work happens off the main thread
+        try:
+            shapes = shapes['shapes']
+            # Counted per call, the analyzer's own totals include concurrent calls
+            hits = 0
+            properties = {}
+            for index, (name, shape) in enumerate(shapes.items()):
+                properties[name], hit = self.analyzer.mass_properties(document_name, name, shape)
+                hits += hit
+                self.rpc_server.progress('analyze_progress', progress=index + 1, total=len(shapes))
+
+            result = {'status': 'success', 'objects': properties}
+            if interference:
+                found, candidates, interference_hits = self.analyzer.interferences(document_name, shapes, tolerance)
+                hits += interference_hits
+                result['interferences'] = found
+                result['candidates'] = candidates
+            result['cache_hits'] = hits
+            return result
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error analyzing '{document_name}': {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+    def _shape_snapshot(self, document_name: str, objects: list, copy: bool = False) -> dict:
+        # Meshing and exporting rewrite the triangulation stored on a shape's faces, which the
+        # document's shape shares with the view provider, so export asks for copies (get_mesh
+        # copies only when it has to mesh, see _shape_copy)
+        try:
+            doc = FreeCAD.getDocument(document_name)
+            self.analyzer.forget(document_name, {object.Name for object in doc.Objects})
+            if objects:
+                selected = self._shape_objects(doc, objects)
+            else:
+                # Intermediate features (e.g. the box under a fillet) would always "interfere" with their result
+                selected = [
+                    object for object in doc.Objects
+                    if hasattr(object, 'Shape') and not object.Shape.isNull()
+                    and not any(hasattr(parent, 'Shape') for parent in object.InList)
+                ]
+            return {'status': 'success', 'shapes': {object.Name: object.Shape.copy() if copy else object.Shape for object in selected}}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def export(self, document_name: str, objects: list | None = None, format: str = 'step', options: dict | None = None) -> dict:
+        """
+        Export objects (by default every shape not used by another object) to a STEP, STL or BREP file.
+        Options: path (copy the export there), tolerance and angular_tolerance (STL only).
+        """
+        if options is None:
+            options = {}
+        format = format.lower()
+        if format not in ExportPipeline.FORMATS:
+            return {'status': 'error', 'message': f'Invalid format. Must be one of: {list(ExportPipeline.FORMATS)}'}
+
+        shapes = self.rpc_server._call(self._shape_snapshot, document_name, objects or [], True)
+        if shapes.get('status') != 'success':
+            return shapes
+        if not shapes['shapes']:
+            return {'status': 'error', 'message': 'Nothing to export.'}
+
+        try:
+            self.rpc_server.progress('export_started', format=format, objects=len(shapes['shapes']))
+            result = self.exports.export(format, shapes['shapes'], options)
+            if options.get('path'):
+                shutil.copyfile(result['path'], options['path'])
+                result['path'] = options['path']
+            FreeCAD.Console.PrintMessage(f"Exported '{document_name}' to {result['path']}{' (cached)' if result['cached'] else ''}.\n")
+            return {'status': 'success', **result}
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error exporting '{document_name}': {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+    def get_mesh(self, document_name: str, object_name: str, tolerance: float = 0.0, chunk: int = 0, mesh_id: str = '', inline: bool = True) -> dict:
+        """
+        Triangle mesh of an object as binary data: float32 x, y, z per vertex followed by
+        uint32 vertex indices per triangle (little-endian), split into chunks for large meshes.
+        A tolerance of 0 picks one from the object's size. Chunk 0 returns a mesh_id that
+        must be passed for the following chunks, so they all come from the same mesh.
+        The whole buffer can also be fetched with a plain HTTP GET of the returned url, which
+        is much faster than base64 chunks; inline=False leaves the data out of the reply.
+        """
+        try:
+            if chunk:
+                mesh = self.meshes.find(mesh_id)
+                if mesh is None:
+                    return {'status': 'error', 'message': f'Mesh "{mesh_id}" is no longer available. Request chunk 0 again.'}
+            else:
+                shapes = self.rpc_server._call(self._shape_snapshot, document_name, [object_name])
+                if shapes.get('status') != 'success':
+                    return shapes
+                shape = shapes['shapes'][object_name]
+                mesh = self.meshes.get(document_name, object_name, shape, tolerance, lambda: self._shape_copy(shape))
+
+            if not 0 <= chunk < mesh.chunks:
+                return {'status': 'error', 'message': f'Invalid chunk. Mesh has {mesh.chunks} chunks.'}
+            result = {
+                'status': 'success',
+                'mesh_id': mesh.id,
+                'url': f'/mesh/{mesh.id}',
+                'vertex_count': mesh.vertex_count,
+                'triangle_count': mesh.triangle_count,
+                'tolerance': mesh.tolerance,
+                'bytes': len(mesh.buffer),
+                'chunks': mesh.chunks,
+                'chunk': chunk
+            }
+            if inline:
+                result['data'] = Binary(mesh.chunk(chunk))
+            return result
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error meshing '{object_name}': {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+    def _shape_copy(self, shape):
+        # Copied on the main thread, which the document's shape shares its triangulation with
+        copy = self.rpc_server._call(shape.copy)
+        if isinstance(copy, dict):
+            raise RuntimeError(copy.get('message', 'Could not copy the shape'))
+        return copy
+
+    def render_view(self, document_name: str, camera: dict | None = None, size: list | None = None, objects: list | None = None, format: str = 'png') -> dict:
+        """
+        Render the document offscreen. Camera: view (isometric, front, top, ...), or camera
+        (an Inventor camera string), background (Current, White, Black, Transparent), quality (webp).
+        """
+        camera = camera or {}
+        objects = objects or []
+        width, height = size or [800, 600]
+        format = format.lower()
+        if format not in ViewRenderer.FORMATS:
+            return {'status': 'error', 'message': f'Invalid format. Must be one of: {list(ViewRenderer.FORMATS)}'}
+        if not (0 < width <= ViewRenderer.MAX_SIZE and 0 < height <= ViewRenderer.MAX_SIZE):
+            return {'status': 'error', 'message': f'Size must be between 1 and {ViewRenderer.MAX_SIZE} pixels.'}
+
+        # Repeated requests for an unchanged document don't need the main thread at all
+        key = self.renders.key(self.revisions.get(document_name), camera, width, height, objects, format)
+        image = self.renders.get(key)
+        if image is not None:
+            self.metrics.count('render_cache_hits')
+            return self._render_result(image, format, width, height, True, 0.0)
+
+        self.metrics.count('render_cache_misses')
+        return self.rpc_server._call(self._render_view, document_name, camera, width, height, objects, format)
+
+    def _render_view(self, document_name: str, camera: dict, width: int, height: int, objects: list, format: str) -> dict:
+        try:
+            key = self.renders.key(self.revisions.get(document_name), camera, width, height, objects, format)
+            start = time.perf_counter()
+            image = ViewRenderer.render(document_name, camera, width, height, objects, format)
+            seconds = time.perf_counter() - start
+
+            self.metrics.time('render', seconds)
+            self.renders.put(key, image)
+            FreeCAD.Console.PrintMessage(f"Rendered '{document_name}' at {width}x{height} in {seconds:.2f}s.\n")
+            return self._render_result(image, format, width, height, False, seconds)
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error rendering '{document_name}': {e}\n")
+            return {'status': 'error', 'message': str(e)}
+
+    def _render_result(self, image: bytes, format: str, width: int, height: int, cached: bool, seconds: float) -> dict:
+        return {
+            'status': 'success', 'format': format, 'width': width, 'height': height,
+            'bytes': len(image), 'cached': cached, 'seconds': seconds, 'data': Binary(image)
+        }
+
+    def get_metrics(self) -> dict:
+        """Render timings, cache hit rates and queue length"""
+        return {
+            'status': 'success',
+            **self.metrics.snapshot(),
+            'render_cache_hit_rate': self.metrics.hit_rate('render_cache_hits', 'render_cache_misses'),
+            'analysis_cache': {'hits': self.analyzer.hits, 'misses': self.analyzer.misses},
+            'queue_length': self.rpc_server.request_queue.qsize()
+        }
+
+    # The file index doesn't touch FreeCAD, so these run straight on the RPC thread
+
+    def index_files(self, paths: list) -> dict:
+        """Index .FCStd files and directories without opening them in FreeCAD"""
+        try:
+            return {'status': 'success', **self.file_index.update(paths)}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
+    def search_files(self, type: str = '', name: str = '', path: str = '', limit: int = 100) -> dict:
+        """Find objects in indexed .FCStd files by type, name or label, and file path"""
+        try:
+            return {'status': 'success', 'objects': self.file_index.query(type or None, name or None, path or None, limit)}
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+
     def execute_code(self, code: str) -> dict:
-        self.rpc_server._queue(self._execute_code, code)
-        return {'status': 'queued'}
+        return self.rpc_server._call(self._execute_code_in_transaction, code)
+
+    def _execute_code_in_transaction(self, code: str) -> dict:
+        # A failing script would otherwise leave half of what it built behind in the active document
+        doc = FreeCAD.ActiveDocument
+        if doc is None:
+            return self._execute_code(code)
+        return self._transaction(doc.Name, 'Execute code', self._execute_code, code)
     
     def _execute_code(self, code: str) -> dict:
         try:
@@ -0,0 +1,131 @@
+"""
+Mass properties and interference checks for document shapes.
+
+Results are cached per object together with the shape they were computed from, and
+reused only while the object still has that same shape (isSame: same underlying
+geometry and placement). A recompute or placement change produces a different shape,
+so stale entries are simply replaced. Holding the shape keeps its geometry alive, so
+unlike its hashCode() (an address) it can't be matched by an unrelated new shape.
+Interference uses a sort-and-sweep over bounding boxes so only pairs whose
+boxes overlap get the (expensive) exact boolean test.
+"""
+
+import threading
+
+
+def _vector(v) -> list:
+    return [v.x, v.y, v.z]
+
+
+def _bound_box(box) -> dict:
+    return {
+        'min': [box.XMin, box.YMin, box.ZMin],
+        'max': [box.XMax, box.YMax, box.ZMax],
+        'size': [box.XLength, box.YLength, box.ZLength]
+    }
+
+
+def _center_of_mass(shape):
+    if hasattr(shape, 'CenterOfMass'):
+        return shape.CenterOfMass
+    # Compounds and shells have no CenterOfMass, so weight their solids by volume
+    solids = shape.Solids
+    volume = sum(solid.Volume for solid in solids)
+    if not volume:
+        return None
+    import FreeCAD
+    center = FreeCAD.Vector()
+    for solid in solids:
+        center += solid.CenterOfMass * (solid.Volume / volume)
+    return center
+
+
+def mass_properties(shape) -> dict:
+    center = _center_of_mass(shape)
+    return {
+        'volume': shape.Volume,
+        'area': shape.Area,
+        'center_of_mass': _vector(center) if center is not None else None,
+        'bound_box': _bound_box(shape.BoundBox),
+        'solids': len(shape.Solids)
+    }
+
+
+class ShapeAnalyzer:
+    """Per-object mass property and pairwise interference cache"""
+
+    def __init__(self):
+        # RPC calls run on several threads
+        self._lock = threading.Lock()
+        # (document, object) -> (shape, mass properties)
+        self._properties = {}
+        # (document, object, object) -> (shape, shape, interference volume)
+        self._interference = {}
+        self.hits = 0
+        self.misses = 0
+
+    def mass_properties(self, document_name: str, name: str, shape) -> tuple:
+        """Return (mass properties, whether they came from the cache)"""
+        key = (document_name, name)
+        with self._lock:
+            cached = self._properties.get(key)
+            if cached and cached[0].isSame(shape):
+                self.hits += 1
+                return cached[1], True
+            self.misses += 1
+
+        result = mass_properties(shape)
+        with self._lock:
+            self._properties[key] = (shape, result)
+        return result, False
+
+    def interferences(self, document_name: str, shapes: dict, tolerance: float = 1e-6) -> tuple:
+        """
+        Return ([{'a', 'b', 'volume'}, ...], number of bounding box candidates, number of them
+        answered from the cache) for overlapping shapes
+        """
+        candidates = self._candidates(shapes)
+
+        found = []
+        hits = 0
+        for a, b in candidates:
+            volume, hit = self._interference_volume(document_name, a, shapes[a], b, shapes[b])
+            hits += hit
+            if volume > tolerance:
+                found.append({'a': a, 'b': b, 'volume': volume})
+        return found, len(candidates), hits
+
+    def _candidates(self, shapes: dict) -> list:
+        # Sort and sweep along x, then check the other axes for the pairs that overlap in x
+        boxes = sorted(((shape.BoundBox, name) for name, shape in shapes.items()), key=lambda item: item[0].XMin)
+        active = []
+        pairs = []
+        for box, name in boxes:
+            active = [(other_box, other) for other_box, other in active if other_box.XMax >= box.XMin]
+            for other_box, other in active:
+                if other_box.intersect(box):
+                    pairs.append(tuple(sorted((name, other))))
+            active.append((box, name))
+        return pairs
+
+    def _interference_volume(self, document_name: str, a: str, shape_a, b: str, shape_b) -> tuple:
+        key = (document_name, a, b)
+        with self._lock:
+            cached = self._interference.get(key)
+            if cached and cached[0].isSame(shape_a) and cached[1].isSame(shape_b):
+                self.hits += 1
+                return cached[2], True
+            self.misses += 1
+
+        volume = shape_a.common(shape_b).Volume
+        with self._lock:
+            self._interference[key] = (shape_a, shape_b, volume)
+        return volume, False
+
+    def forget(self, document_name: str, names: set):
+        """Drop cache entries for objects that no longer exist"""
+        with self._lock:
+            for key in [k for k in self._properties if k[0] == document_name and k[1] not in names]:
+                del self._properties[key]
+            for key in [k for k in self._interference if k[0] == document_name and not {k[1], k[2]} <= names]:
+                del self._interference[key]
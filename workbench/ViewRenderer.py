@@ -0,0 +1,205 @@
+"""
+Offscreen snapshots of a document's 3D view.
+
+Renders build their own Coin scene: a new camera and headlight over the view's scene
+graph (or over just the requested objects' nodes), drawn by an SoOffscreenRenderer at
+the requested size. The live view's camera, zoom and object visibility are never
+touched, so the user's window doesn't move or flicker. Images are cached by document
+revision, camera, size, objects and format. Revisions come from document observers
+that bump a counter on any object, property or view change, so an unchanged model is
+never rendered twice.
+"""
+
+import itertools
+import json
+import threading
+
+from collections import OrderedDict
+
+FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+# View name -> (direction from the model to the camera, camera up direction)
+VIEWS = {
+    'isometric': ((1, -1, 1), (0, 0, 1)), 'front': ((0, -1, 0), (0, 0, 1)), 'rear': ((0, 1, 0), (0, 0, 1)),
+    'top': ((0, 0, 1), (0, 1, 0)), 'bottom': ((0, 0, -1), (0, 1, 0)), 'left': ((-1, 0, 0), (0, 0, 1)),
+    'right': ((1, 0, 0), (0, 0, 1))
+}
+BACKGROUNDS = ('Current', 'White', 'Black', 'Transparent')
+MAX_SIZE = 4096
+
+
+class DocumentRevisions:
+    """App and Gui document observer tracking a revision number per document"""
+
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self._revisions = {}
+
+    def get(self, document_name: str) -> int:
+        if document_name not in self._revisions:
+            self._revisions[document_name] = next(self._counter)
+        return self._revisions[document_name]
+
+    def _bump(self, object):
+        try:
+            # View providers reach their document through their object
+            document = getattr(object, 'Object', object).Document
+            self._revisions[document.Name] = next(self._counter)
+        except Exception:
+            pass
+
+    def slotCreatedObject(self, object):
+        self._bump(object)
+
+    def slotDeletedObject(self, object):
+        self._bump(object)
+
+    def slotChangedObject(self, object, prop):
+        self._bump(object)
+
+    def slotDeletedDocument(self, document):
+        # Gui documents wrap their App document
+        self._revisions.pop(getattr(document, 'Document', document).Name, None)
+
+
+class RenderCache:
+    """Encoded images, evicted least recently used past max_bytes"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def key(self, revision: int, camera: dict, width: int, height: int, objects: list, format: str) -> str:
+        return json.dumps([revision, camera, width, height, sorted(objects), format], sort_keys=True)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key: str, image: bytes):
+        with self._lock:
+            if key in self._images:
+                return
+            self._images[key] = image
+            self._size += len(image)
+            while self._size > self.max_bytes and len(self._images) > 1:
+                self._size -= len(self._images.popitem(last=False)[1])
+
+
+def _camera(camera: dict, scene, region):
+    from pivy import coin
+
+    if camera.get('camera'):
+        # Inventor camera string, as returned by getCamera() in the Python console
+        source = coin.SoInput()
+        source.setBuffer(camera['camera'])
+        nodes = coin.SoDB.readAll(source)
+        if nodes is None or not nodes.getNumChildren() or not nodes.getChild(0).isOfType(coin.SoCamera.getClassTypeId()):
+            raise ValueError('Invalid camera. Expected an Inventor camera string.')
+        return nodes.getChild(0)
+
+    direction, up = VIEWS[camera.get('view', 'isometric')]
+    result = coin.SoOrthographicCamera()
+    result.position.setValue(*direction)
+    result.pointAt(coin.SbVec3f(0, 0, 0), coin.SbVec3f(*up))
+    result.viewAll(scene, region)
+    return result
+
+
+def _object_node(view_object):
+    """The object's scene node, drawn in its first display mode if it is hidden"""
+    from pivy import coin
+
+    root = view_object.RootNode
+    if view_object.Visibility:
+        return root
+    switch_type = coin.SoSwitch.getClassTypeId()
+    # Share the object's nodes in a new group rather than showing the object in the live view
+    node = coin.SoSeparator()
+    for index in range(root.getNumChildren()):
+        child = root.getChild(index)
+        if child.isOfType(switch_type) and child.getNumChildren():
+            child = child.getChild(0)
+        node.addChild(child)
+    return node
+
+
+def _background_color(background: str) -> tuple:
+    if background == 'White':
+        return (1.0, 1.0, 1.0)
+    if background in ('Black', 'Transparent'):
+        return (0.0, 0.0, 0.0)
+    import FreeCAD
+    # Packed 0xRRGGBBAA, the flat background color from the preferences
+    packed = FreeCAD.ParamGet('User parameter:BaseApp/Preferences/View').GetUnsigned('BackgroundColor', 0x333333FF)
+    return tuple(((packed >> shift) & 0xFF) / 255 for shift in (24, 16, 8))
+
+
+def render(document_name: str, camera: dict, width: int, height: int, objects: list, format: str) -> bytes:
+    """Render the document offscreen and return the encoded image (main thread only)"""
+    import FreeCAD
+    import FreeCADGui
+    from pivy import coin
+    from PySide2 import QtCore, QtGui
+
+    doc = FreeCAD.getDocument(document_name)
+    view_name = camera.get('view', 'isometric')
+    if view_name not in VIEWS:
+        raise ValueError(f'Invalid view. Must be one of: {list(VIEWS)}')
+    background = camera.get('background', 'Current')
+    if background not in BACKGROUNDS:
+        raise ValueError(f'Invalid background. Must be one of: {list(BACKGROUNDS)}')
+
+    scene = coin.SoSeparator()
+    if objects:
+        # Just the requested objects (including ones hidden under a boolean or fillet)
+        missing = [name for name in objects if not doc.getObject(name)]
+        if missing:
+            raise ValueError(f'Objects not found: {", ".join(missing)}')
+        for name in objects:
+            view_object = doc.getObject(name).ViewObject
+            if view_object is not None:
+                scene.addChild(_object_node(view_object))
+    else:
+        views = FreeCADGui.getDocument(document_name).mdiViewsOfType('Gui::View3DInventor')
+        if not views:
+            raise ValueError(f'Document "{document_name}" has no 3D view')
+        scene.addChild(views[0].getSceneGraph())
+
+    region = coin.SbViewportRegion(width, height)
+    view_camera = _camera(camera, scene, region)
+    # A headlight, like the viewer's, shining along the camera's line of sight
+    light = coin.SoDirectionalLight()
+    light.direction.setValue(view_camera.orientation.getValue().multVec(coin.SbVec3f(0, 0, -1)))
+    root = coin.SoSeparator()
+    root.addChild(view_camera)
+    root.addChild(light)
+    root.addChild(scene)
+
+    renderer = coin.SoOffscreenRenderer(region)
+    transparent = background == 'Transparent'
+    renderer.setComponents(coin.SoOffscreenRenderer.RGB_TRANSPARENCY if transparent else coin.SoOffscreenRenderer.RGB)
+    renderer.setBackgroundColor(coin.SbColor(*_background_color(background)))
+    if not renderer.render(root):
+        raise ValueError('Offscreen rendering failed')
+
+    # Coin's buffer is bottom-up, Qt's images top-down
+    components = 4 if transparent else 3
+    # QImage wraps the buffer without copying, so keep it alive until mirrored() copies it
+    buffer = renderer.getBuffer()
+    pixels = QtGui.QImage(
+        buffer, width, height, width * components,
+        QtGui.QImage.Format_RGBA8888 if transparent else QtGui.QImage.Format_RGB888
+    )
+    image = pixels.mirrored()
+
+    data = QtCore.QByteArray()
+    output = QtCore.QBuffer(data)
+    output.open(QtCore.QIODevice.WriteOnly)
+    if not image.save(output, FORMATS[format], int(camera.get('quality', 80)) if format == 'webp' else -1):
+        raise ValueError(f'This FreeCAD cannot encode {format} images')
+    return bytes(data)